@@ -0,0 +1,245 @@
+"""
+seatingchart.api
+~~~~~~~~~~~~~~~~
+
+This module contains JSON endpoints of the `main` blueprint, for scripts that
+want groups back without the index page's form, session and template.
+"""
+
+from concurrent.futures import as_completed
+import json
+
+from flask import Response, current_app, jsonify, request, url_for
+
+from app.main import bp
+from app.main.backend import InfeasibleError, PhaseStats, create_seating_chart
+from app.main.jobs import QueueFull, get_queue
+from app.main.search import shared_pool
+
+
+@bp.route("/api/generate", methods=["POST"])
+def api_generate():
+    """Returns a seating chart for a JSON roster
+
+    The request body is a JSON object with `names` and, optionally,
+    `together`, `apart`, `max_size`, `num_groups`, `seed`, `engine` and
+    `placement`. A missing, null or 0 size means no limit, as on the index page.
+
+    Example:
+        >>> client.post("/api/generate", json={"names": ["a", "b", "c"], "max_size": 2, "seed": 1}).json
+        {'groups': [['b', 'c'], ['a']]}
+    """
+    stats = PhaseStats() if current_app.config["PROFILE_BACKEND"] else None
+    try:
+        kwargs = chart_arguments(request.get_json(silent=True))
+        chart = create_seating_chart(**kwargs, stats=stats)
+    except InfeasibleError as e:
+        return _error(str(e), constraint=e.constraint)
+    except (KeyError, ValueError) as e:
+        return _error(e.args[0] if e.args else str(e))
+
+    response = jsonify(groups=chart)
+    if stats is not None and stats.timings:
+        response.headers["Server-Timing"] = stats.server_timing()
+    return response
+
+
+@bp.route("/api/generate/bulk", methods=["POST"])
+def api_generate_bulk():
+    """Streams seating charts for many JSON rosters
+
+    The request body is a JSON object with a `charts` list, each entry taking
+    the same fields as `/api/generate`. Rosters are solved concurrently on the
+    process pool shared with `search.best_seating_chart`, and each result is written as one line of
+    newline-delimited JSON as soon as it finishes, so lines may arrive out of
+    order. Every line carries the `index` of its roster and either `groups` or
+    an `error`.
+
+    Example:
+        >>> body = {"charts": [{"names": ["a", "b"], "seed": 1}, {"names": ["c"]}]}
+        >>> print(client.post("/api/generate/bulk", json=body).data.decode())
+        {"groups": [["c"]], "index": 1}
+        {"groups": [["b", "a"]], "index": 0}
+    """
+    payload = request.get_json(silent=True)
+    charts = payload.get("charts") if isinstance(payload, dict) else None
+    if not isinstance(charts, list):
+        return _error("'charts' must be a list of JSON objects")
+    if len(charts) > current_app.config["BULK_MAX_CHARTS"]:
+        return _error(
+            "Too many charts in one request (at most {})".format(
+                current_app.config["BULK_MAX_CHARTS"]
+            )
+        )
+
+    invalid, jobs = [], []
+    for index, chart in enumerate(charts):
+        try:
+            jobs.append((index, chart_arguments(chart)))
+        except (KeyError, ValueError) as e:
+            invalid.append({"error": e.args[0], "index": index})
+
+    pool = shared_pool(current_app.config["BULK_WORKERS"])
+    futures = {pool.submit(solve_chart, kwargs, index): index for index, kwargs in jobs}
+
+    def generate():
+        try:
+            for line in invalid:
+                yield json.dumps(line, sort_keys=True) + "\n"
+            for future in as_completed(futures):
+                # The response has already started, so report failures in-line
+                try:
+                    line = future.result()
+                except Exception as e:
+                    line = {
+                        "error": str(e) or type(e).__name__,
+                        "index": futures[future],
+                    }
+                yield json.dumps(line, sort_keys=True) + "\n"
+        finally:
+            # Drop queued rosters if the client goes away
+            for future in futures:
+                future.cancel()
+
+    return Response(generate(), mimetype="application/x-ndjson")
+
+
+@bp.route("/api/jobs", methods=["POST"])
+def api_submit_job():
+    """Queues a seating chart for a JSON roster and returns the job id
+
+    The request body takes the same fields as `/api/generate`. The job runs on
+    the background pool; poll the URL in the `Location` header for the result.
+
+    Example:
+        >>> client.post("/api/jobs", json={"names": ["a", "b", "c"]}).json
+        {'id': '3f2b...', 'status': 'pending'}
+    """
+    try:
+        kwargs = chart_arguments(request.get_json(silent=True))
+    except (KeyError, ValueError) as e:
+        return _error(e.args[0] if e.args else str(e))
+
+    try:
+        job_id = get_queue().submit(solve_chart, kwargs)
+    except QueueFull as e:
+        return _error(str(e), status=503)
+
+    response = jsonify(id=job_id, status="pending")
+    response.headers["Location"] = url_for("main.api_job", job_id=job_id)
+    return response, 202
+
+
+@bp.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job(job_id):
+    """Returns the status of a queued job, and its result once finished
+
+    Finished jobs carry `groups`, or `error` (and `constraint`) if no chart
+    fits, and are kept for `JOB_TTL` seconds.
+
+    Example:
+        >>> client.get("/api/jobs/3f2b...").json
+        {'groups': [['b', 'c', 'a']], 'id': '3f2b...', 'status': 'done'}
+    """
+    job = get_queue().status(job_id)
+    if job is None:
+        return _error("No such job, or its result has expired", status=404)
+
+    result = job.pop("result", None) or {}
+    if "error" in result:
+        job["status"] = "failed"
+    return jsonify(**job, **result)
+
+
+def solve_chart(kwargs: dict, index=None) -> dict:
+    """Solves one roster, returning the result as a JSON-ready dict
+
+    Args:
+        kwargs (dict): Output of `chart_arguments`
+        index (int, optional): Defaults to None. Position in a bulk request.
+
+    Returns:
+        dict: `groups`, or `error` (and `constraint`, if any) when no chart fits
+    """
+    result = {} if index is None else {"index": index}
+    try:
+        result["groups"] = create_seating_chart(**kwargs)
+    except InfeasibleError as e:
+        result.update(error=str(e), constraint=e.constraint)
+    except (KeyError, ValueError) as e:
+        result["error"] = e.args[0] if e.args else str(e)
+    return result
+
+
+def chart_arguments(payload) -> dict:
+    """Converts a JSON request body to `create_seating_chart` keyword arguments
+
+    Args:
+        payload (dict): Decoded JSON object
+
+    Returns:
+        dict: Keyword arguments for `create_seating_chart`
+
+    Example:
+        >>> chart_arguments({"names": ["a", "b"], "together": [["a", "b"]], "max_size": 0})
+        {'names': ['a', 'b'], 'together': [['a', 'b']], 'apart': None, 'max_size': inf, 'num_groups': inf}
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+
+    names = payload.get("names")
+    if not isinstance(names, list) or not all(isinstance(i, str) for i in names):
+        raise ValueError("'names' must be a list of strings")
+
+    kwargs = {
+        "names": names,
+        "together": _groupings(payload, "together"),
+        "apart": _groupings(payload, "apart"),
+        "max_size": _size(payload, "max_size"),
+        "num_groups": _size(payload, "num_groups"),
+    }
+
+    if payload.get("seed") is not None:
+        if not _is_int(payload["seed"]):
+            raise ValueError("'seed' must be an integer")
+        kwargs["seed"] = payload["seed"]
+
+    for option in ["engine", "placement"]:
+        if payload.get(option) is not None:
+            if not isinstance(payload[option], str):
+                raise ValueError(f"'{option}' must be a string")
+            kwargs[option] = payload[option]
+
+    return kwargs
+
+
+def _groupings(payload: dict, key: str):
+    value = payload.get(key)
+    if not value:
+        return None
+    if not isinstance(value, list) or not all(
+        isinstance(pair, list)
+        and len(pair) == 2
+        and all(isinstance(i, str) for i in pair)
+        and pair[0] != pair[1]
+        for pair in value
+    ):
+        raise ValueError(f"'{key}' must be a list of pairs of two different names")
+    return value
+
+
+def _size(payload: dict, key: str):
+    value = payload.get(key)
+    if not value:
+        return float("Inf")
+    if not _is_int(value) or value < 0:
+        raise ValueError(f"'{key}' must be a non-negative integer")
+    return value
+
+
+def _is_int(value) -> bool:
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _error(message: str, status=400, **extra):
+    return jsonify(error=message, **extra), status
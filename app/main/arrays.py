@@ -0,0 +1,224 @@
+"""
+seatingchart.arrays
+~~~~~~~~~~~~~~~~~~~
+
+This module contains an integer-encoded, NumPy-backed engine for
+`create_seating_chart`, meant for rosters with thousands of individuals.
+
+Names are interned into integer ids once. Group membership is held as an int
+array and constraints as index arrays, so feasibility checks and balancing run
+vectorized. Names are only turned back into strings on the way out.
+"""
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+
+def create_seating_chart(
+    names: list,
+    together=None,
+    apart=None,
+    max_size=float("Inf"),
+    num_groups=float("Inf"),
+    rng=None,
+):
+    """Returns nested list of names that meet grouping parameters
+
+    Follows the same rules as `app.main.backend.create_seating_chart`, except
+    that a separated individual skips over full groups instead of opening a
+    new one.
+
+    Args:
+        names (list): Individuals we are grouping. Each name must be unique
+        together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
+        apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
+        max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
+        num_groups (int, optional): Defaults to float("Inf"). Number of groups.
+        rng (int or numpy.random.Generator, optional): Defaults to None. Seed or
+            generator for the shuffle.
+
+    Returns:
+        list: Nested list with entries for each group
+    """
+    if np is None:
+        raise ImportError("The 'numpy' engine requires NumPy to be installed")
+    rng = np.random.default_rng(rng)
+
+    names_arr = np.asarray(names, dtype=object)
+    n = len(names_arr)
+    if n == 0:
+        return []
+    ids = _intern(names_arr)
+
+    together_edges = _encode_pairs(together, ids)
+    apart_edges = _encode_pairs(apart, ids)
+
+    # -1 marks unplaced individuals; group sizes never outnumber individuals
+    assignment = np.full(n, -1, dtype=np.int64)
+    sizes = np.zeros(n + 1, dtype=np.int64)
+    order = []
+    num_current = 0
+
+    # 1. Together components become the initial groups, largest first
+    if len(together_edges):
+        labels = _components(n, together_edges)
+        members = np.unique(together_edges)
+        roots, counts = np.unique(labels[members], return_counts=True)
+        rank = np.argsort(-counts, kind="stable")
+        if len(counts) and counts.max() > max_size:
+            raise ValueError("Group too big")
+
+        group_of_root = np.empty(n, dtype=np.int64)
+        group_of_root[roots[rank]] = np.arange(len(roots))
+        assignment[members] = group_of_root[labels[members]]
+        sizes[: len(roots)] = counts[rank]
+        num_current = len(roots)
+        order.append(members[np.argsort(assignment[members], kind="stable")])
+
+    # 2. Separated individuals go to the first group free of their conflicts
+    if len(apart_edges):
+        indptr, neighbours = _adjacency(n, apart_edges)
+        for person in apart_edges.ravel():
+            if assignment[person] != -1:
+                continue
+            conflicts = assignment[neighbours[indptr[person] : indptr[person + 1]]]
+            allowed = sizes[:num_current] < max_size
+            allowed[conflicts[conflicts >= 0]] = False
+            group = int(np.argmax(allowed)) if allowed.any() else num_current
+            if group == num_current:
+                num_current += 1
+            assignment[person] = group
+            sizes[group] += 1
+            order.append(np.array([person]))
+
+    # 3. Remaining individuals are shuffled and balanced across groups
+    remaining = np.flatnonzero(assignment == -1)
+    rng.shuffle(remaining)
+    counts = _fill_counts(sizes[:num_current], len(remaining), max_size, num_groups)
+    assignment[remaining] = np.repeat(np.arange(len(counts)), counts)
+    order.append(remaining)
+    num_current = max(num_current, len(counts))
+
+    if num_current > num_groups:
+        raise ValueError(
+            "Group definitions do not allow for the ..."
+            "Please change the number of groups or the group/separates definitions"
+        )
+
+    order = np.concatenate(order) if order else np.empty(0, dtype=np.int64)
+    order = order[np.argsort(assignment[order], kind="stable")]
+    bounds = np.cumsum(np.bincount(assignment[order], minlength=num_current))[:-1]
+    return [names_arr[chunk].tolist() for chunk in np.split(order, bounds)]
+
+
+def _intern(names_arr) -> dict:
+    """Returns name -> integer id, raising if a name occurs more than once"""
+    ids = {name: i for i, name in enumerate(names_arr.tolist())}
+    if len(ids) != len(names_arr):
+        raise KeyError("Value occurrs more than once")
+    return ids
+
+
+def _encode_pairs(pairs, ids: dict):
+    """Encodes nested lists of names as an (k, 2) array of id edges
+
+    Entries with more than two names are linked to their first name.
+    """
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+
+    edges = []
+    for pair in pairs:
+        try:
+            encoded = [ids[i] for i in pair]
+        except KeyError as e:
+            raise ValueError(f"{e.args[0]!r} is not in `names`")
+        links = [(encoded[0], i) for i in encoded[1:]]
+        edges += links or [(encoded[0], encoded[0])]
+    return np.array(edges, dtype=np.int64).reshape(-1, 2)
+
+
+def _components(n: int, edges):
+    """Returns a component label for each of `n` ids, linked by `edges`
+
+    Labels are propagated along edges with `np.minimum.at` and then shortcut
+    by pointer jumping, until no label changes.
+    """
+    labels = np.arange(n)
+    src, dst = edges[:, 0], edges[:, 1]
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, src, labels[dst])
+        np.minimum.at(labels, dst, labels[src])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def _adjacency(n: int, edges):
+    """Returns CSR (indptr, neighbours) arrays of an undirected edge list"""
+    src = np.concatenate([edges[:, 0], edges[:, 1]])
+    dst = np.concatenate([edges[:, 1], edges[:, 0]])
+    sort = np.argsort(src, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=n), out=indptr[1:])
+    return indptr, dst[sort]
+
+
+def _fill_counts(sizes, k: int, max_size, num_groups):
+    """Returns how many of `k` items each group receives
+
+    Matches adding items one by one to the smallest group (lowest index
+    first), opening new groups while there are fewer than `num_groups` and
+    whenever every group has reached `max_size`.
+
+    Returns:
+        numpy.ndarray: Items per group, including any newly opened groups
+    """
+    counts = np.zeros(len(sizes), dtype=np.int64)
+    if k == 0:
+        return counts
+
+    if len(sizes) and sizes.max() > max_size:
+        raise ValueError("Largest group exceeds `max_size` parameter")
+
+    # Open new single-item groups up to `num_groups`
+    opened = 0
+    if len(sizes) == 0:
+        opened = 1
+    if num_groups != float("Inf"):
+        opened = max(opened, min(k, int(num_groups) - len(sizes)))
+    if opened > 0:
+        sizes = np.concatenate([sizes, np.zeros(opened, dtype=np.int64)])
+        counts = np.concatenate([counts, np.ones(opened, dtype=np.int64)])
+        k -= opened
+
+    # Water-fill existing groups up to `max_size`
+    current = sizes + counts
+    cap = max_size if max_size != float("Inf") else current.max() + k
+    room = int(np.clip(cap - current, 0, None).sum())
+    fill = min(k, room)
+    if fill:
+        low, high = int(current.min()), int(cap)
+        while low < high:
+            level = (low + high + 1) // 2
+            if np.clip(level - current, 0, cap - current).sum() <= fill:
+                low = level
+            else:
+                high = level - 1
+        added = np.clip(low - current, 0, cap - current)
+        extra = fill - int(added.sum())
+        at_level = np.flatnonzero((current + added == low) & (current + added < cap))
+        added[at_level[:extra]] += 1
+        counts += added
+        k -= fill
+
+    # Overflow goes into new groups filled to `max_size` one at a time
+    if k:
+        full, partial = divmod(k, int(max_size))
+        overflow = [int(max_size)] * full + ([partial] if partial else [])
+        counts = np.concatenate([counts, np.array(overflow, dtype=np.int64)])
+
+    return counts
@@ -6,11 +6,23 @@ This module contains code for generating the primary functional logic of this
 application.
 """
 
+from contextlib import contextmanager
+import csv
+from functools import lru_cache
+import heapq
 import random
+import time
 from itertools import chain
 import re
 import json
 
+# Number of seeded charts kept by `create_seating_chart`
+CHART_CACHE_SIZE = 256
+
+_INDIVIDUAL_SEPARATORS = re.compile("[,;\n\r]+")
+_LINE_SEPARATORS = re.compile("[\n\r]+")
+_WHITESPACE = re.compile(r"\s+")
+
 
 def create_seating_chart(
     names: list,
@@ -18,15 +30,30 @@ def create_seating_chart(
     apart=None,
     max_size=float("Inf"),
     num_groups=float("Inf"),
+    engine="python",
+    placement="greedy",
+    seed=None,
+    stats=None,
 ):
     """Returns nested list of names that meet grouping parameters
 
+    Charts generated from an integer `seed` are reproducible, and are served
+    from a bounded LRU cache keyed by every argument (see `chart_cache_info`).
+
     Args:
         names (list): Individuals we are grouping. Each name must be unique
         together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
         apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
         max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
         num_groups (int, optional): Defaults to float("Inf"). Number of groups.
+        engine (str, optional): Defaults to "python". Use "numpy" to solve large
+            rosters with the integer-encoded engine in `app.main.arrays`.
+        placement (str, optional): Defaults to "greedy". Use "dsatur" to place
+            together groups and separated individuals by graph coloring.
+        seed (int or random.Random, optional): Defaults to None, which uses the
+            global `random` state. Seed or generator for the shuffle.
+        stats (PhaseStats, optional): Defaults to None. Records wall time and
+            operation counts of each phase. Cached charts record one "cache" phase.
 
     Returns:
         list: Nested list with entries for each group
@@ -39,39 +66,524 @@ def create_seating_chart(
         >>> create_seating_chart(names, together, apart, max_size=max_size)
         [['e', 'b', 'a', 'c'], ['g', 'd', 'f', 'j'], ['k', 'h', 'i']]
     """
-    # Initialize namespace variables
-    remaining = names.copy()
-    random.shuffle(remaining)
-
-    if (
-        apart is not None
-        and together is not None
-        and any([i in apart for i in together])
+    if stats is None:
+        stats = _NO_STATS
+
+    if seed is None or isinstance(seed, random.Random):
+        return _solve_seating_chart(
+            names, together, apart, max_size, num_groups, engine, placement, seed, stats
+        )
+
+    with stats.phase("cache"):
+        chart = _cached_seating_chart(
+            _freeze(names),
+            _freeze(together),
+            _freeze(apart),
+            max_size,
+            num_groups,
+            engine,
+            placement,
+            seed,
+        )
+        return [list(g) for g in chart]
+
+
+class PhaseStats:
+    """Wall time and operation counts for each phase of `create_seating_chart`
+
+    Example:
+        >>> stats = PhaseStats()
+        >>> chart = create_seating_chart(["a", "b", "c"], stats=stats)
+        >>> sorted(stats.timings)
+        ['balance', 'create_groups', 'overlap_check', 'remaining', ...]
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.counts = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        """Adds the wall time spent inside the block to phase `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed
+
+    def count(self, name: str, n=1):
+        """Adds `n` to operation counter `name`"""
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    def as_dict(self) -> dict:
+        return {"timings": dict(self.timings), "counts": dict(self.counts)}
+
+    def server_timing(self) -> str:
+        """Returns timings formatted for a `Server-Timing` HTTP header"""
+        return ", ".join(
+            "{};dur={:.3f}".format(name, seconds * 1000)
+            for name, seconds in self.timings.items()
+        )
+
+
+class _NullStats:
+    """Stand-in for `PhaseStats` that records nothing"""
+
+    def phase(self, name):
+        return self
+
+    def count(self, name, n=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STATS = _NullStats()
+
+
+def chart_cache_info() -> dict:
+    """Returns hit/miss counters and size of the seeded chart cache"""
+    info = _cached_seating_chart.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "maxsize": info.maxsize,
+    }
+
+
+def clear_chart_cache():
+    """Empties the seeded chart cache and resets its counters"""
+    _cached_seating_chart.cache_clear()
+
+
+def _freeze(nested):
+    """Returns a hashable, canonical copy of a (nested) list of names"""
+    if nested is None:
+        return None
+    return tuple(i if isinstance(i, str) else _freeze(i) for i in nested)
+
+
+@lru_cache(maxsize=CHART_CACHE_SIZE)
+def _cached_seating_chart(
+    names, together, apart, max_size, num_groups, engine, placement, seed
+):
+    chart = _solve_seating_chart(
+        list(names),
+        together,
+        apart,
+        max_size,
+        num_groups,
+        engine,
+        placement,
+        random.Random(seed),
+    )
+    return _freeze(chart)
+
+
+def _solve_seating_chart(
+    names, together, apart, max_size, num_groups, engine, placement, rng, stats=None
+):
+    if engine == "numpy":
+        together, apart = normalize_constraints(together, apart)
+        check_feasibility(names, together, apart, max_size, num_groups)
+        from app.main import arrays
+
+        seed = None if rng is None else rng.getrandbits(64)
+        with (stats or _NO_STATS).phase("numpy"):
+            return arrays.create_seating_chart(
+                names, together, apart, max_size, num_groups, rng=seed
+            )
+    if engine != "python":
+        raise KeyError("'engine' must of one of: 'python' or 'numpy'")
+
+    problem = ChartProblem(
+        names, together, apart, max_size, num_groups, placement, stats=stats
+    )
+    return problem.solve(rng, stats=stats)
+
+
+def create_seating_charts(
+    names: list,
+    together=None,
+    apart=None,
+    max_size=float("Inf"),
+    num_groups=float("Inf"),
+    n=1,
+    seed=None,
+    placement="greedy",
+):
+    """Returns `n` candidate seating charts that meet grouping parameters
+
+    Constraints are parsed, grouped and separated once; each chart then only
+    shuffles and balances the remaining individuals.
+
+    Args:
+        names (list): Individuals we are grouping. Each name must be unique
+        together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
+        apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
+        max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
+        num_groups (int, optional): Defaults to float("Inf"). Number of groups.
+        n (int, optional): Defaults to 1. Number of charts to generate.
+        seed (int, optional): Defaults to None. Seed for reproducible charts.
+        placement (str, optional): Defaults to "greedy". Use "dsatur" to place
+            together groups and separated individuals by graph coloring.
+
+    Returns:
+        list: List of `n` nested lists, one per chart
+    """
+    problem = ChartProblem(names, together, apart, max_size, num_groups, placement)
+    rng = random.Random(seed)
+    return [problem.solve(rng) for _ in range(n)]
+
+
+class ChartProblem:
+    """Roster and constraints compiled once, for cheap repeated solves
+
+    Overlap checks, together grouping and apart separation run when the problem
+    is built. The compiled groups and remaining individuals are stored as
+    tuples, so problems are immutable, hashable and can be pickled to worker
+    processes. Two problems are equal when they compile to the same structures.
+
+    Args:
+        names (list): Individuals we are grouping. Each name must be unique
+        together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
+        apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
+        max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
+        num_groups (int, optional): Defaults to float("Inf"). Number of groups.
+        placement (str, optional): Defaults to "greedy". Use "dsatur" to place
+            together groups and separated individuals by graph coloring.
+
+    Example:
+        >>> problem = ChartProblem(["a", "b", "c", "d"], [["a", "b"]], max_size=2)
+        >>> problem.solve(random.Random(0))
+        [['a', 'b'], ['c', 'd']]
+    """
+
+    __slots__ = ("groups", "remaining", "max_size", "num_groups", "_key")
+
+    def __init__(
+        self,
+        names: list,
+        together=None,
+        apart=None,
+        max_size=float("Inf"),
+        num_groups=float("Inf"),
+        placement="greedy",
+        stats=None,
     ):
-        raise ValueError("Cannot have overlap in `together` and `apart`")
+        groups_sep, remaining = _compile_groups(
+            names, together, apart, max_size, num_groups, placement, stats
+        )
+        self.groups = tuple(tuple(g) for g in groups_sep)
+        self.remaining = tuple(remaining)
+        self.max_size = max_size
+        self.num_groups = num_groups
+        self._key = (self.groups, self.remaining, max_size, num_groups)
 
-    groups = _create_groups(together)
-    groups_sep = _separate_individuals(groups, apart, max_size)
+    def __eq__(self, other):
+        return isinstance(other, ChartProblem) and self._key == other._key
 
-    if groups_sep != []:
-        if max_size < max([len(g) for g in groups_sep]):
-            raise ValueError("Group too big")
+    def __hash__(self):
+        return hash(self._key)
+
+    def __getstate__(self):
+        return self._key
 
-    grouped_students = list(set(chain(*groups_sep)))
-    for student in grouped_students:
-        remaining.remove(student)
-    for student in remaining:
-        _balance_nested_list(
-            groups_sep, student, max_size=max_size, num_groups=num_groups
+    def __setstate__(self, state):
+        self.groups, self.remaining, self.max_size, self.num_groups = state
+        self._key = state
+
+    def __repr__(self):
+        return "<ChartProblem {} groups, {} remaining>".format(
+            len(self.groups), len(self.remaining)
         )
 
-    if len(groups_sep) > num_groups:
-        raise ValueError(
-            "Group definitions do not allow for the ..."
-            "Please change the number of groups or the group/separates definitions"
+    def solve(self, rng=None, stats=None):
+        """Returns a new chart with the shuffled remaining individuals balanced in
+
+        Args:
+            rng (random.Random, optional): Defaults to None, which uses the
+                global `random` state. Source of the shuffle.
+            stats (PhaseStats, optional): Defaults to None. Records phase timings.
+
+        Returns:
+            list: Nested list with entries for each group
+        """
+        if stats is None:
+            stats = _NO_STATS
+
+        with stats.phase("shuffle"):
+            chart = [list(g) for g in self.groups]
+            remaining = list(self.remaining)
+            (random if rng is None else rng).shuffle(remaining)
+
+        with stats.phase("balance"):
+            balancer = _Balancer(
+                chart, max_size=self.max_size, num_groups=self.num_groups
+            )
+            for student in remaining:
+                balancer.add(student)
+        stats.count("balanced", len(remaining))
+        stats.count("groups", len(chart))
+
+        if len(chart) > self.num_groups:
+            raise ValueError(
+                "Group definitions do not allow for the ..."
+                "Please change the number of groups or the group/separates definitions"
+            )
+
+        return chart
+
+
+def normalize_constraints(together=None, apart=None):
+    """Removes duplicate and reversed pairs, and rejects direct contradictions
+
+    Pairs are compared as unordered frozensets, so ["b", "a"] repeats ["a", "b"].
+    Contradictions through together components are left to `check_feasibility`.
+
+    Args:
+        together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
+        apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
+
+    Returns:
+        tuple: Together and apart pairs, first occurrence kept, or None if empty
+
+    Raises:
+        InfeasibleError: A pair is in both `together` and `apart`
+
+    Example:
+        >>> normalize_constraints([["a", "b"], ["b", "a"]], [["a", "c"], ["c", "a"]])
+        ([['a', 'b']], [['a', 'c']])
+    """
+    together, apart = _unique_pairs(together), _unique_pairs(apart)
+
+    overlap = [pair for key, pair in apart.items() if key in together]
+    if overlap:
+        raise InfeasibleError(
+            "Cannot have overlap in `together` and `apart`: {}".format(
+                ", ".join(overlap[0])
+            ),
+            constraint=overlap[0],
         )
 
-    return groups_sep
+    return list(together.values()) or None, list(apart.values()) or None
+
+
+def _unique_pairs(pairs) -> dict:
+    """Returns first occurrence of each pair, keyed by frozenset of its members"""
+    unique = {}
+    for pair in pairs or []:
+        unique.setdefault(frozenset(pair), list(pair))
+    return unique
+
+
+class InfeasibleError(ValueError):
+    """Raised when no chart can meet the grouping parameters
+
+    Attributes:
+        constraint (list): Individuals or pair at fault, if any
+    """
+
+    def __init__(self, message, constraint=None):
+        super().__init__(message)
+        self.constraint = constraint
+
+
+def check_feasibility(
+    names: list,
+    together=None,
+    apart=None,
+    max_size=float("Inf"),
+    num_groups=float("Inf"),
+):
+    """Rejects grouping parameters that no chart can meet, before solving
+
+    Checks total capacity, together groups larger than `max_size`, apart pairs
+    joined by `together`, and a greedy lower bound on the largest set of
+    mutually separated individuals against `num_groups`.
+
+    Args:
+        names (list): Individuals we are grouping
+        together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
+        apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
+        max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
+        num_groups (int, optional): Defaults to float("Inf"). Number of groups.
+
+    Raises:
+        InfeasibleError: Describes the constraint at fault
+
+    Example:
+        >>> check_feasibility(["a", "b", "c"], [["a", "b"]], [["b", "a"]])
+        Traceback (most recent call last):
+        InfeasibleError: 'b' and 'a' must be apart, but are grouped by `together`
+    """
+    _check_feasibility(names, _create_groups(together), apart, max_size, num_groups)
+
+
+def _check_feasibility(names, groups, apart, max_size, num_groups):
+    if len(names) > num_groups * max_size:
+        raise InfeasibleError(
+            "{} individuals do not fit in {} groups of at most {}".format(
+                len(names), num_groups, max_size
+            )
+        )
+
+    # `groups` is sorted largest first
+    if groups and len(groups[0]) > max_size:
+        raise InfeasibleError(
+            "Together group {} is larger than `max_size` ({})".format(
+                ", ".join(groups[0]), max_size
+            ),
+            constraint=groups[0],
+        )
+
+    # Nodes are together groups (by index) or individuals (by name)
+    node_of = {name: i for i, group in enumerate(groups) for name in group}
+    neighbours = {}
+    for pair in apart or []:
+        node_1, node_2 = [node_of.get(i, i) for i in pair[:2]]
+        if node_1 == node_2:
+            raise InfeasibleError(
+                "{!r} and {!r} must be apart, but are grouped by `together`".format(
+                    *pair[:2]
+                ),
+                constraint=list(pair),
+            )
+        neighbours.setdefault(node_1, set()).add(node_2)
+        neighbours.setdefault(node_2, set()).add(node_1)
+
+    if num_groups != float("Inf") and len(neighbours) > num_groups:
+        clique = _greedy_clique(neighbours)
+        if len(clique) > num_groups:
+            members = [groups[i][0] if isinstance(i, int) else i for i in clique]
+            raise InfeasibleError(
+                "{} must all be kept apart, which needs more than `num_groups` "
+                "({}) groups".format(", ".join(members), num_groups),
+                constraint=members,
+            )
+
+
+def _greedy_clique(neighbours: dict, starts=8) -> list:
+    """Returns a large clique of an adjacency dict, grown greedily from the
+    `starts` highest degree nodes; a lower bound on the number of groups needed
+    """
+    by_degree = sorted(neighbours, key=lambda i: len(neighbours[i]), reverse=True)
+    best = []
+    for start in by_degree[:starts]:
+        clique = [start]
+        candidates = sorted(
+            neighbours[start], key=lambda i: len(neighbours[i]), reverse=True
+        )
+        for node in candidates:
+            if len(neighbours[node]) < len(clique):
+                break
+            if all(node in neighbours[i] for i in clique):
+                clique.append(node)
+        if len(clique) > len(best):
+            best = clique
+    return best
+
+
+def _compile_groups(
+    names: list, together, apart, max_size, num_groups, placement="greedy", stats=None
+):
+    """Returns groups implied by `together` and `apart`, and everyone else
+
+    Args:
+        names (list): Individuals we are grouping
+        together (list): List of pairwise explicit grouped individuals
+        apart (list): List of pairwise explicit separated individuals
+        max_size (int): Maximum size for a single group
+        num_groups (int): Number of groups
+        placement (str, optional): Defaults to "greedy". One of "greedy" or "dsatur".
+        stats (PhaseStats, optional): Defaults to None. Records phase timings.
+
+    Returns:
+        tuple: Nested list of constrained groups, list of remaining individuals
+    """
+    if stats is None:
+        stats = _NO_STATS
+    stats.count("names", len(names))
+    stats.count("together_pairs", len(together or []))
+    stats.count("apart_pairs", len(apart or []))
+
+    with stats.phase("overlap_check"):
+        together, apart = normalize_constraints(together, apart)
+
+    with stats.phase("create_groups"):
+        groups = _create_groups(together)
+
+    with stats.phase("feasibility"):
+        _check_feasibility(names, groups, apart, max_size, num_groups)
+
+    with stats.phase("separate_individuals"):
+        if placement == "greedy":
+            groups_sep = _separate_individuals(groups, apart, max_size)
+        elif placement == "dsatur":
+            groups_sep = _color_groups(groups, apart, max_size, num_groups)
+        else:
+            raise KeyError("'placement' must of one of: 'greedy' or 'dsatur'")
+
+    if groups_sep != []:
+        if max_size < max([len(g) for g in groups_sep]):
+            raise ValueError("Group too big")
+
+    with stats.phase("remaining"):
+        grouped_students = set(chain(*groups_sep))
+        if not grouped_students.issubset(names):
+            raise ValueError("All grouped and separated individuals must be in `names`")
+        remaining = [i for i in names if i not in grouped_students]
+
+    return groups_sep, remaining
+
+
+class _DisjointSet:
+    """Union-find over hashable items, with path compression and union by size"""
+
+    def __init__(self):
+        self._parent = {}
+        self._size = {}
+
+    def add(self, item):
+        if item not in self._parent:
+            self._parent[item] = item
+            self._size[item] = 1
+
+    def find(self, item):
+        root = item
+        while self._parent[root] != root:
+            root = self._parent[root]
+
+        # Path compression
+        while self._parent[item] != root:
+            self._parent[item], item = root, self._parent[item]
+        return root
+
+    def union(self, item_1, item_2):
+        root_1, root_2 = self.find(item_1), self.find(item_2)
+        if root_1 == root_2:
+            return root_1
+        if self._size[root_1] < self._size[root_2]:
+            root_1, root_2 = root_2, root_1
+        self._parent[root_2] = root_1
+        self._size[root_1] += self._size[root_2]
+        return root_1
+
+    def components(self):
+        """Returns members of each set, in first-seen order, largest set first"""
+        members = {}
+        for item in self._parent:
+            members.setdefault(self.find(item), []).append(item)
+
+        groups = list(members.values())
+        groups.sort(key=len, reverse=True)
+        return groups
 
 
 def _create_groups(together: list):
@@ -88,31 +600,92 @@ def _create_groups(together: list):
         >>> _create_groups(together)
         [["a", "b", "e"], ["d", "g"]]
     """
-    groups = []
     if together is None:
-        return groups
+        return []
 
+    sets = _DisjointSet()
     for pair in together:
-        if groups == []:
-            groups.append(pair)
-            continue
+        for item in pair:
+            sets.add(item)
+        for item in pair[1:]:
+            sets.union(pair[0], item)
 
-        bool_union = False
-        for group in groups:
-            intersect = list(set(pair) & set(group))
+    return sets.components()
 
-            if intersect != []:
-                union = list(set(pair) | set(group))
-                groups.remove(group)
-                groups.append(union)
-                bool_union = True
-                break
 
-        if not bool_union:
-            groups.append(pair)
+class _Chart:
+    """Nested list of groups that keeps a name -> group index lookup up to date
+
+    The wrapped nested list is mutated in place, so callers holding a reference
+    to it see every change made through the chart. Each group also tracks the
+    names it may not receive, according to the conflict index `conflicts`.
+    """
+
+    def __init__(self, groups=None, conflicts=None):
+        self.groups = [] if groups is None else groups
+        self.conflicts = {} if conflicts is None else conflicts
+        self._positions = {}
+        self._forbidden = []
+        for i, group in enumerate(self.groups):
+            self._forbidden.append(set())
+            for name in group:
+                if name in self._positions:
+                    raise KeyError("Value occurrs more than once")
+                self._positions[name] = i
+                self._forbidden[i] |= self.conflicts.get(name, set())
+
+    def __len__(self):
+        return len(self.groups)
+
+    def __iter__(self):
+        return iter(self.groups)
+
+    def __getitem__(self, i):
+        return self.groups[i]
+
+    def position(self, name):
+        """Returns index of the group containing `name`, or None"""
+        return self._positions.get(name)
+
+    def allows(self, name, i):
+        """Returns True if no member of group `i` must be kept apart from `name`"""
+        return name not in self._forbidden[i]
+
+    def add(self, name, i):
+        """Appends `name` to the group at index `i`"""
+        self.groups[i].append(name)
+        self._positions[name] = i
+        self._forbidden[i] |= self.conflicts.get(name, set())
+
+    def new_group(self, names):
+        """Appends a new group made of `names`"""
+        self.groups.append([])
+        self._forbidden.append(set())
+        for name in names:
+            self.add(name, len(self.groups) - 1)
+
+
+def _conflict_index(apart: list) -> dict:
+    """Returns the forbidden partners of each individual
+
+    Args:
+        apart (list): Nested list of explicit pairwise separations
+
+    Returns:
+        dict: Set of names each individual must be kept apart from
 
-    groups.sort(key=len, reverse=True)
-    return groups
+    Example:
+        >>> _conflict_index([["a", "b"], ["a", "c"]])
+        {"a": {"b", "c"}, "b": {"a"}, "c": {"a"}}
+    """
+    conflicts = {}
+    if apart is None:
+        return conflicts
+
+    for pair in apart:
+        for item in pair:
+            conflicts.setdefault(item, set()).update(i for i in pair if i != item)
+    return conflicts
 
 
 def _get_nested_position(var: str, chart: list):
@@ -120,12 +693,15 @@ def _get_nested_position(var: str, chart: list):
 
     Args:
         var (str): Variable we're searching for
-        chart (list): Nested list
+        chart (list): Nested list, or `_Chart` for a constant time lookup
 
     Returns:
         int: Index of nested list that contains `var`. Returns None if not found.
     """
-    idx = [chart.index(i) for i in chart if var in i]
+    if isinstance(chart, _Chart):
+        return chart.position(var)
+
+    idx = [i for i, group in enumerate(chart) if var in group]
     if len(idx) == 1:
         return idx[0]
     if len(idx) == 0:
@@ -139,40 +715,23 @@ def _append_item(var: str, chart: list, apart: list, max_size):
 
     Args:
         var (str): Variable being appended
-        chart (list): Nested list
-        apart (list): List of pairwise separation rules
+        chart (list): Nested list, or `_Chart` carrying its own conflict index
+        apart (list): List of pairwise separation rules, or output of `_conflict_index`
         max_size [(type)]: [descrition]
     """
+    if not isinstance(chart, _Chart):
+        if not isinstance(apart, dict):
+            apart = _conflict_index(apart)
+        chart = _Chart(chart, apart)
 
-    appended = False
     for i, group in enumerate(chart):
-        if var not in group:
-
-            kosher = True
-            for a_pair in apart:
-                if var not in a_pair:
-                    continue
-
-                b_pair = a_pair.copy()
-                b_pair.remove(var)
-                other_var = b_pair[0]
-
-                if other_var in group:
-                    kosher = False
-                    break
-
-            if kosher:
-                if len(group) >= max_size:
-                    break
-                chart[i] += [var]
-                appended = True
+        if chart.allows(var, i):
+            if len(group) >= max_size:
                 break
+            chart.add(var, i)
+            return
 
-        if appended:
-            break
-
-    if not appended:
-        chart.append([var])
+    chart.new_group([var])
 
 
 def _separate_individuals(groups: list, apart: list, max_size=float("Inf")) -> list:
@@ -198,73 +757,188 @@ def _separate_individuals(groups: list, apart: list, max_size=float("Inf")) -> l
         [["a", "b", "c"], ["d", "e", "f"], ["g"]]
     """
 
-    chart = [i[:] for i in groups]
+    conflicts = _conflict_index(apart)
+    chart = _Chart([i[:] for i in groups], conflicts)
 
     if apart is None:
-        return chart
+        return chart.groups
 
     for pair in apart:
         item_1, item_2 = pair
-        pos_1, pos_2 = list(map(lambda i: _get_nested_position(i, chart), pair))
+        pos_1, pos_2 = chart.position(item_1), chart.position(item_2)
 
         # 1. chart is empty
-        if chart == []:
-            return [[item_1], [item_2]]
+        if len(chart) == 0:
+            chart.new_group([item_1])
+            chart.new_group([item_2])
 
         # 2. pair is already grouped, and members are in different lists; good!
         elif pos_1 is not None and pos_2 is not None and pos_1 != pos_2:
             continue
 
         # 3. One pair member is grouped, other remaining
-        elif ((pos_1 is None) ^ (pos_2 is None)) and (
-            (pos_1 is not None) ^ (pos_2 is not None)
-        ):
+        elif (pos_1 is None) ^ (pos_2 is None):
             remaining_item = item_1 if pos_1 is None else item_2
-            _append_item(remaining_item, chart, apart, max_size)
+            _append_item(remaining_item, chart, conflicts, max_size)
 
         # 4. Both remaining
         elif pos_1 is None and pos_2 is None:
-            _append_item(item_1, chart, apart, max_size)
-            _append_item(item_2, chart, apart, max_size)
+            _append_item(item_1, chart, conflicts, max_size)
+            _append_item(item_2, chart, conflicts, max_size)
+
+    return chart.groups
+
+
+def _color_groups(
+    groups: list, apart: list, max_size=float("Inf"), num_groups=float("Inf")
+) -> list:
+    """Assigns together groups and separated individuals to groups by DSatur
+    graph coloring
+
+    Each together group, and each separated individual outside of one, is a
+    node; apart pairs are edges between nodes. The node with the most distinct
+    neighbouring groups (then the most neighbours, then the largest) is placed
+    next, into the least filled group that holds none of its neighbours and
+    still has room.
+
+    Args:
+        groups (list): Nested list representing groups
+        apart (list): Nested list of explicit pairwise separations
+        max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
+        num_groups (int, optional): Defaults to float("Inf"). Number of groups.
+
+    Returns:
+        list: Nested list of groups
+
+    Example:
+        >>> groups = [["a", "b"], ["c", "d"]]
+        >>> apart = [["a", "c"], ["a", "e"], ["c", "e"]]
+        >>> _color_groups(groups, apart)
+        [["a", "b"], ["c", "d"], ["e"]]
+    """
+    nodes = [i[:] for i in groups]
+    node_of = {name: i for i, group in enumerate(nodes) for name in group}
+    for pair in apart or []:
+        for name in pair:
+            if name not in node_of:
+                node_of[name] = len(nodes)
+                nodes.append([name])
+
+    neighbours = [set() for _ in nodes]
+    for pair in apart or []:
+        node_1, node_2 = node_of[pair[0]], node_of[pair[1]]
+        if node_1 != node_2:
+            neighbours[node_1].add(node_2)
+            neighbours[node_2].add(node_1)
+
+    def priority(node):
+        return (-len(saturation[node]), -len(neighbours[node]), -len(nodes[node]))
+
+    saturation = [set() for _ in nodes]
+    color = [None] * len(nodes)
+    heap = [priority(i) + (i,) for i in range(len(nodes))]
+    heapq.heapify(heap)
+
+    chart, sizes = [], []
+    while heap:
+        entry = heapq.heappop(heap)
+        node = entry[-1]
+        if color[node] is not None or entry[:-1] != priority(node):
+            continue
+
+        size = len(nodes[node])
+        allowed = [
+            c
+            for c in range(len(chart))
+            if c not in saturation[node] and sizes[c] + size <= max_size
+        ]
+        opening = num_groups != float("Inf") and len(chart) < num_groups
+        if not allowed or opening:
+            chart.append([])
+            sizes.append(0)
+            allowed = [len(chart) - 1]
+        c = min(allowed, key=lambda i: sizes[i])
+
+        color[node] = c
+        chart[c] += nodes[node]
+        sizes[c] += size
+        for other in neighbours[node]:
+            if color[other] is None and c not in saturation[other]:
+                saturation[other].add(c)
+                heapq.heappush(heap, priority(other) + (other,))
 
     return chart
 
 
+class _Balancer:
+    """Adds items to the smallest group of a nested list, respecting max size and
+    number of internal lists
+
+    Group sizes are kept in a min-heap alongside the nested list, so each
+    placement costs O(log g). The balancer must be the only writer to the
+    nested list while it is in use.
+    """
+
+    def __init__(self, nested, max_size=float("Inf"), num_groups=float("Inf")):
+        self.nested = nested
+        self.max_size = max_size
+        self.num_groups = num_groups
+        self._heap = [(len(group), i) for i, group in enumerate(nested)]
+        heapq.heapify(self._heap)
+        self._max = max([size for size, _ in self._heap], default=0)
+
+    def add(self, item: str):
+        """Adds item to the smallest group, or to a new group"""
+        if not self._heap:
+            self._new_group(item)
+            return
+
+        if self._max > self.max_size:
+            raise ValueError("Largest group exceeds `max_size` parameter")
+
+        min_size, min_index = self._heap[0]
+        if self.num_groups != float("Inf") and len(self.nested) < self.num_groups:
+            self._new_group(item)
+        elif min_size == self._max and self._max >= self.max_size:
+            self._new_group(item)
+        else:
+            heapq.heapreplace(self._heap, (min_size + 1, min_index))
+            self._max = max(self._max, min_size + 1)
+            _add_to_group(self.nested, item, min_index)
+
+    def _new_group(self, item):
+        _add_to_group(self.nested, item)
+        heapq.heappush(self._heap, (1, len(self.nested) - 1))
+        self._max = max(self._max, 1)
+
+
 def _balance_nested_list(
     nested: list, item: str, max_size=float("Inf"), num_groups=float("Inf")
 ):
     """Balances a nested list, respecting max size and number of internal lists
 
+    Use `_Balancer` directly when adding many items to the same nested list.
+
     Args:
-        nested (list): Nested list
+        nested (list): Nested list, or `_Chart`
         item (str): Item to be added
         max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
         num_groups (int, optional): Defaults to float("Inf"). Maximum number of groups.
     """
-    if nested == []:
-        nested.append([item])
-        return
-
-    nested_size = [len(i) for i in nested]
-    all_same_len = len(set(nested_size)) == 1
-    max_nested_size = max(nested_size)
-    num_current_groups = len(nested)
-    min_index = nested_size.index(min(nested_size))
-
-    if max_nested_size > max_size:
-        raise ValueError("Largest group exceeds `max_size` parameter")
-    if num_current_groups > num_groups and max_nested_size > max_size:
-        raise ValueError(
-            "Number of tables is greater than value specified by `num_groups` "
-            "and group size is greater than value specified by `max_size`"
-        )
+    _Balancer(nested, max_size=max_size, num_groups=num_groups).add(item)
 
-    if num_groups != float("Inf") and num_current_groups < num_groups:
-        nested.append([item])
-    elif all_same_len and (max_nested_size >= max_size):
+
+def _add_to_group(nested, item, i=None):
+    """Adds item to the group at index `i`, or to a new group if `i` is None"""
+    if isinstance(nested, _Chart):
+        if i is None:
+            nested.new_group([item])
+        else:
+            nested.add(item, i)
+    elif i is None:
         nested.append([item])
     else:
-        nested[min_index] += [item]
+        nested[i].append(item)
 
 
 def render_output(out: list):
@@ -281,10 +955,10 @@ def render_output(out: list):
 
 def store_display(names: list):
     """Converts a list of strings to a fixed-width (40) string
-    
+
     Args:
         names (list): List of strings to join
-    
+
     Returns:
         str: Joined and concatenated string for displaying
     """
@@ -301,19 +975,47 @@ def form_to_function(input_str, category):
         )
 
     if category == "individuals":
-        return list(re.split("[,;\n\r]+", input_str))
+        return _INDIVIDUAL_SEPARATORS.split(input_str)
 
     elif category == "groupings":
         if input_str is None or input_str == "":
             return None
 
-        nest = [i.split(",") for i in re.split("[\n\r]+", input_str)]
+        nest = [i.split(",") for i in _LINE_SEPARATORS.split(input_str)]
         return [[i.strip() for i in j] for j in nest]
 
     else:
         return float("Inf") if input_str == 0 else input_str
 
 
+def read_roster(lines) -> list:
+    """Parses a CSV or newline separated roster in a single streaming pass
+
+    Every comma or semicolon separated cell is a name. Names have surrounding
+    whitespace stripped and inner whitespace collapsed; blank and repeated
+    names are dropped.
+
+    Args:
+        lines (iterable): Lines of text, e.g. a text-mode file
+
+    Returns:
+        list: Unique names, in the order they first appear
+
+    Example:
+        >>> read_roster(["Amy,  Bob\n", "Carly;Amy\n", "\n", "Dan  Smith\n"])
+        ['Amy', 'Bob', 'Carly', 'Dan Smith']
+    """
+    names, seen = [], set()
+    for row in csv.reader(lines):
+        for cell in row:
+            for name in cell.split(";"):
+                name = _WHITESPACE.sub(" ", name).strip()
+                if name and name not in seen:
+                    seen.add(name)
+                    names.append(name)
+    return names
+
+
 def form_to_model(input_str, category):
     if not category in ["individuals", "groupings"]:
         raise KeyError("'category' must of one of: 'individuals' or 'groupings'")
@@ -1,11 +1,17 @@
 from flask_wtf import FlaskForm
+from flask_wtf.file import FileField, FileAllowed
 from flask_login import current_user
 from wtforms import TextAreaField, IntegerField, SubmitField, StringField
 from wtforms.validators import ValidationError, DataRequired
 from app.models import User, Group
+from app.main.backend import form_to_function, read_roster
 
+import csv
+import io
 import re
 
+ROSTER_EXTENSIONS = ["csv", "txt"]
+
 
 class SeatingChartForm(FlaskForm):
     tf_rows_long = 10
@@ -41,20 +47,73 @@ class SeatingChartForm(FlaskForm):
             "cols": tf_cols,
         },
     )
+    roster = FileField(
+        "Or upload a roster (CSV, or one name per line)",
+        validators=[
+            FileAllowed(ROSTER_EXTENSIONS, "Please upload a .csv or .txt file.")
+        ],
+    )
     num_groups = IntegerField("Number of groups", default=0)
     max_size = IntegerField("Maximum group size (individuals per group)", default=0)
     submit = SubmitField("Generate")
 
+    def roster_names(self):
+        """Returns the individuals, from the uploaded roster if there is one
+
+        The roster or textarea is parsed once per request, and the uploaded file
+        is read as a stream rather than loaded into a string. An upload that
+        cannot be read gives no individuals and sets `roster_error`.
+        """
+        if getattr(self, "_roster_names", None) is None:
+            self.roster_error = None
+            if self.roster.data:
+                self._roster_names = self._read_roster()
+            else:
+                self._roster_names = form_to_function(
+                    self.individuals.data, "individuals"
+                )
+        return self._roster_names
+
+    def _allowed_roster(self):
+        filename = self.roster.data.filename or ""
+        return filename.rsplit(".", 1)[-1].lower() in ROSTER_EXTENSIONS
+
+    def _read_roster(self):
+        # FileAllowed runs after this is first called, so check the file here
+        if not self._allowed_roster():
+            self.roster_error = "Please upload a .csv or .txt file."
+            return []
+
+        stream = io.TextIOWrapper(
+            self.roster.data.stream, encoding="utf-8-sig", newline=""
+        )
+        try:
+            return read_roster(stream)
+        except (UnicodeDecodeError, csv.Error):
+            self.roster_error = "Please upload a UTF-8 encoded .csv or .txt file."
+            return []
+        finally:
+            stream.detach()
+
     def validate_individuals(self, individuals):
-        indiv = re.split("[,;\n\r]+", individuals.data)
+        indiv = self.roster_names()
+        if self.roster_error is not None:
+            # FileAllowed reports the wrong file type on the roster field itself
+            if not self._allowed_roster():
+                return
+            raise ValidationError(self.roster_error)
         if len(indiv) <= 1:
             raise ValidationError("Please enter more than one individual.")
 
+        if self.roster.data:
+            return
         if not any(sep in individuals.data for sep in [",", ";", "\n", "\r"]):
             raise ValidationError("Please separate individuals on new lines.")
 
     def validate_together(self, together):
-        individuals = re.split("[,;\n\r]+", self.individuals.data)
+        individuals = set(self.roster_names())
+        if self.roster_error is not None:
+            return
         together = re.split("[,;\n\r]+", together.data)
         together_indiv = list(set([i.strip() for i in together]))
 
@@ -68,7 +127,9 @@ class SeatingChartForm(FlaskForm):
             raise ValidationError("All persons must be included in Individuals")
 
     def validate_separate(self, separate):
-        individuals = list(filter(None, re.split("[,;\n\r]+", self.individuals.data)))
+        individuals = set(self.roster_names())
+        if self.roster_error is not None:
+            return
         separate = filter(None, re.split("[,;\n\r]+", separate.data))
         separate_indiv = list(set([i.strip() for i in separate]))
         all_present = all([i in individuals for i in separate_indiv])
@@ -0,0 +1,247 @@
+"""
+seatingchart.jobs
+~~~~~~~~~~~~~~~~~
+
+This module contains a background job queue, so long-running generation can
+run outside the request that asked for it.
+
+Jobs run on a bounded process pool. Their states are kept by a pluggable
+`JobStore`: `MemoryJobStore` for a single process, or `SqliteJobStore` so any
+web worker on the host can report a job's status. Finished jobs expire after a
+TTL.
+
+The pool and the `max_pending` bound belong to each web worker, not to the
+host: with N gunicorn workers, up to N pools run and up to N * max_pending jobs
+can be pending. A job whose web worker exits before it finishes is never
+finished, and reads as "pending" until its TTL expires.
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from flask import current_app
+
+_lock = threading.Lock()
+
+
+class QueueFull(RuntimeError):
+    """Raised when a job is submitted while too many are pending"""
+
+
+class JobStore(ABC):
+    """Interface for the place job states are kept
+
+    A job state is a dict with the job `id`, its `status` (one of "pending",
+    "done" or "failed") and, once finished, its `result`.
+    """
+
+    @abstractmethod
+    def add(self, job_id: str, expires: float):
+        """Records a new pending job"""
+
+    @abstractmethod
+    def finish(self, job_id: str, status: str, result: dict, expires: float):
+        """Records the outcome of a job"""
+
+    @abstractmethod
+    def get(self, job_id: str, now: float):
+        """Returns the state of a job, or None if it is unknown or expired"""
+
+    @abstractmethod
+    def purge(self, now: float):
+        """Drops expired jobs"""
+
+
+class MemoryJobStore(JobStore):
+    """Keeps jobs in a dict, visible to this process only"""
+
+    def __init__(self):
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def add(self, job_id, expires):
+        with self._lock:
+            self._jobs[job_id] = {"id": job_id, "status": "pending", "expires": expires}
+
+    def finish(self, job_id, status, result, expires):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(status=status, result=result, expires=expires)
+
+    def get(self, job_id, now):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["expires"] < now:
+                return None
+            return {k: v for k, v in job.items() if k != "expires"}
+
+    def purge(self, now):
+        with self._lock:
+            for job_id in [k for k, v in self._jobs.items() if v["expires"] < now]:
+                del self._jobs[job_id]
+
+
+class SqliteJobStore(JobStore):
+    """Keeps jobs in a SQLite file, readable by every process that opens it
+
+    Only job states are shared; each process still runs its own jobs.
+
+    Args:
+        path (str): Database file. The `job` table is created if missing.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job ("
+                "id TEXT PRIMARY KEY, status TEXT NOT NULL, result TEXT, "
+                "expires REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_job_expires ON job (expires)")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def add(self, job_id, expires):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO job (id, status, expires) VALUES (?, 'pending', ?)",
+                (job_id, expires),
+            )
+
+    def finish(self, job_id, status, result, expires):
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE job SET status = ?, result = ?, expires = ? WHERE id = ?",
+                (status, json.dumps(result), expires, job_id),
+            )
+
+    def get(self, job_id, now):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT status, result FROM job WHERE id = ? AND expires >= ?",
+                (job_id, now),
+            ).fetchone()
+        if row is None:
+            return None
+        job = {"id": job_id, "status": row[0]}
+        if row[1] is not None:
+            job["result"] = json.loads(row[1])
+        return job
+
+    def purge(self, now):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM job WHERE expires < ?", (now,))
+
+
+class JobQueue(object):
+    """Runs jobs on a bounded process pool and records them in a `JobStore`
+
+    Args:
+        store (JobStore, optional): Defaults to None, a `MemoryJobStore`.
+        workers (int, optional): Defaults to None, one per core.
+        ttl (float, optional): Defaults to 3600. Seconds a job is kept.
+        max_pending (int, optional): Defaults to 100. Unfinished jobs of this
+            queue allowed before `submit` raises `QueueFull`.
+        executor (concurrent.futures.Executor, optional): Defaults to None.
+            Pool to run jobs on instead of starting one.
+
+    Example:
+        >>> queue = JobQueue(ttl=60)
+        >>> job_id = queue.submit(sorted, ["b", "a"])
+        >>> queue.status(job_id)  # once finished
+        {'id': '...', 'status': 'done', 'result': ['a', 'b']}
+    """
+
+    def __init__(
+        self, store=None, workers=None, ttl=3600, max_pending=100, executor=None
+    ):
+        self.store = store if store is not None else MemoryJobStore()
+        self.ttl = ttl
+        self.max_pending = max_pending
+        self._executor = executor or ProcessPoolExecutor(max_workers=workers)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Builds a queue from the JOB_* settings of a Flask config"""
+        backend = config["JOB_BACKEND"]
+        if backend == "memory":
+            store = MemoryJobStore()
+        elif backend == "sqlite":
+            store = SqliteJobStore(config["JOB_DATABASE"])
+        elif isinstance(backend, JobStore):
+            store = backend
+        else:
+            raise KeyError("'JOB_BACKEND' must of one of: 'memory' or 'sqlite'")
+
+        return cls(
+            store,
+            workers=config["JOB_WORKERS"],
+            ttl=config["JOB_TTL"],
+            max_pending=config["JOB_MAX_PENDING"],
+        )
+
+    def submit(self, func, *args) -> str:
+        """Queues `func(*args)` and returns the new job's id
+
+        `func` and `args` must be picklable. A job that raises is recorded as
+        "failed" with the error message as its result.
+        """
+        now = time.time()
+        self.store.purge(now)
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull(
+                    "Too many pending jobs (at most {})".format(self.max_pending)
+                )
+            self._pending += 1
+
+        job_id = uuid.uuid4().hex
+        try:
+            self.store.add(job_id, now + self.ttl)
+            future = self._executor.submit(func, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def status(self, job_id: str):
+        """Returns the state of a job, or None if it is unknown or expired"""
+        return self.store.get(job_id, time.time())
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def _finish(self, job_id, future):
+        try:
+            status, result = "done", future.result()
+        except Exception as e:
+            status, result = "failed", {"error": str(e)}
+
+        try:
+            self.store.finish(job_id, status, result, time.time() + self.ttl)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+
+def get_queue(app=None) -> JobQueue:
+    """Returns the job queue of `app`, defaulting to the current app
+
+    The queue is created from the app config on first use.
+    """
+    app = app or current_app._get_current_object()
+    with _lock:
+        if "jobs" not in app.extensions:
+            app.extensions["jobs"] = JobQueue.from_config(app.config)
+    return app.extensions["jobs"]
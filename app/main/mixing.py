@@ -0,0 +1,146 @@
+"""
+seatingchart.mixing
+~~~~~~~~~~~~~~~~~~~
+
+This module contains a simulated annealing stage that runs after
+`create_seating_chart` and swaps individuals between groups, so that people
+who have sat together before are less likely to sit together again.
+"""
+
+import math
+import random
+
+from app.main.backend import _conflict_index, _create_groups
+
+
+def mix_groups(
+    chart: list,
+    history,
+    together=None,
+    apart=None,
+    iterations=10000,
+    temperature=1.0,
+    cooling=0.999,
+    rng=None,
+):
+    """Returns a chart that lowers the count of repeated pairings
+
+    Only swaps between groups are tried, so group sizes and `max_size` are kept.
+    Individuals in a together group never move, and a swap is rejected if it
+    would seat an apart pair together. Each swap updates the score from per
+    group pair weights instead of rescoring the whole chart.
+
+    Args:
+        chart (list): Nested list, output of `create_seating_chart`. Left unchanged.
+        history (dict): Times each pair has sat together, keyed by
+            frozenset({name_1, name_2})
+        together (list, optional): Defaults to None. List of pairwise explicit grouped individuals.
+        apart (list, optional): Defaults to None. List of pairwise explicit separated individuals.
+        iterations (int, optional): Defaults to 10000. Number of swaps to try.
+        temperature (float, optional): Defaults to 1.0. Starting temperature.
+        cooling (float, optional): Defaults to 0.999. Temperature decay per swap.
+        rng (random.Random, optional): Defaults to None. Source of randomness.
+
+    Returns:
+        list: Nested list with entries for each group
+
+    Example:
+        >>> chart = [["a", "b"], ["c", "d"]]
+        >>> history = {frozenset(["a", "b"]): 2, frozenset(["c", "d"]): 1}
+        >>> mix_groups(chart, history, rng=random.Random(0))
+        [['a', 'd'], ['c', 'b']]
+    """
+    rng = rng or random.Random()
+    groups = [list(g) for g in chart]
+    group_of = {name: g for g, group in enumerate(groups) for name in group}
+
+    weights = {name: {} for name in group_of}
+    for pair, count in history.items():
+        pair = tuple(pair)
+        if len(pair) == 2 and count and all(i in group_of for i in pair):
+            weights[pair[0]][pair[1]] = count
+            weights[pair[1]][pair[0]] = count
+
+    conflicts = _conflict_index(apart)
+    pinned = set(name for group in _create_groups(together) for name in group)
+    movable = [name for name in group_of if name not in pinned]
+
+    # cost[name][g]: repeated pairings `name` would have in group g
+    # blocked[name][g]: apart partners of `name` seated in group g
+    cost = {name: [0] * len(groups) for name in group_of}
+    blocked = {name: [0] * len(groups) for name in group_of}
+    for name, g in group_of.items():
+        for other, weight in weights[name].items():
+            cost[other][g] += weight
+        for other in conflicts.get(name, ()):
+            if other in blocked:
+                blocked[other][g] += 1
+
+    score = sum(cost[name][g] for name, g in group_of.items()) // 2
+    best_score, best_groups = score, [g[:] for g in groups]
+
+    for _ in range(iterations if len(groups) > 1 and len(movable) > 1 else 0):
+        if best_score == 0:
+            break
+
+        name_1, name_2 = rng.sample(movable, 2)
+        g_1, g_2 = group_of[name_1], group_of[name_2]
+        if g_1 == g_2:
+            continue
+
+        apart_12 = name_2 in conflicts.get(name_1, ())
+        if blocked[name_1][g_2] - apart_12 or blocked[name_2][g_1] - apart_12:
+            continue
+
+        weight_12 = weights[name_1].get(name_2, 0)
+        delta = (
+            cost[name_1][g_2]
+            + cost[name_2][g_1]
+            - cost[name_1][g_1]
+            - cost[name_2][g_2]
+            - 2 * weight_12
+        )
+        if delta > 0 and rng.random() >= math.exp(-delta / max(temperature, 1e-9)):
+            temperature *= cooling
+            continue
+        temperature *= cooling
+
+        _move(name_1, g_1, g_2, groups, group_of, weights, conflicts, cost, blocked)
+        _move(name_2, g_2, g_1, groups, group_of, weights, conflicts, cost, blocked)
+        score += delta
+        if score < best_score:
+            best_score, best_groups = score, [g[:] for g in groups]
+
+    return best_groups
+
+
+def pair_history(charts: list) -> dict:
+    """Counts how often each pair sat in the same group
+
+    Args:
+        charts (list): Past charts, each a nested list of names
+
+    Returns:
+        dict: Count per frozenset({name_1, name_2})
+    """
+    history = {}
+    for chart in charts:
+        for group in chart:
+            for i, name_1 in enumerate(group):
+                for name_2 in group[i + 1 :]:
+                    pair = frozenset((name_1, name_2))
+                    history[pair] = history.get(pair, 0) + 1
+    return history
+
+
+def _move(name, old, new, groups, group_of, weights, conflicts, cost, blocked):
+    groups[old].remove(name)
+    groups[new].append(name)
+    group_of[name] = new
+    for other, weight in weights[name].items():
+        cost[other][old] -= weight
+        cost[other][new] += weight
+    for other in conflicts.get(name, ()):
+        if other in blocked:
+            blocked[other][old] -= 1
+            blocked[other][new] += 1
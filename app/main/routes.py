@@ -1,20 +1,39 @@
-from flask import render_template, flash, redirect, url_for, request, session
+from flask import (
+    render_template,
+    flash,
+    redirect,
+    url_for,
+    request,
+    session,
+    current_app,
+    make_response,
+    abort,
+)
 from flask_login import current_user, login_user, logout_user, login_required
+from sqlalchemy import and_, or_
 from werkzeug.urls import url_parse
 import json
+import random
 from datetime import datetime
 
 from app import db
 from app.main.forms import SeatingChartForm, SaveForm, LoadForm
 from app.main.backend import (
+    InfeasibleError,
+    PhaseStats,
     create_seating_chart,
     render_output,
-    store_display,
     form_to_function,
-    form_to_model,
-    model_to_form,
 )
-from app.models import User, Group, GroupConfig
+from app.main.mixing import mix_groups
+from app.main.storage import (
+    form_names,
+    invalidate_form,
+    load_form,
+    save_group,
+    session_roster,
+)
+from app.models import ContentBlob, User, Group, GroupConfig, PairHistory
 from app.main import bp
 
 
@@ -23,6 +42,7 @@ from app.main import bp
 def index():
     output_text = ""
     form = SeatingChartForm()
+    stats = PhaseStats() if current_app.config["PROFILE_BACKEND"] else None
 
     try:
         session_form = session["group_generation_form"]
@@ -31,7 +51,8 @@ def index():
 
     if request.method == "GET":
         if session_form is not None:
-            form.individuals.data = session["group_generation_form"]["names"]
+            names = form_names(session["group_generation_form"])
+            form.individuals.data = "\n".join(names or [])
             form.together.data = session["group_generation_form"]["together"]
             form.separate.data = session["group_generation_form"]["apart"]
             form.num_groups.data = session["group_generation_form"]["num_groups"]
@@ -41,50 +62,107 @@ def index():
     if request.method == "POST":
         if form.validate_on_submit():
 
+            indiv = form.roster_names()
+            # Only logged-in users can save or accept, so only their long
+            # rosters are stored server-side
             session["group_generation_form"] = {
-                "names": form.individuals.data,
+                **session_roster(indiv, stash=current_user.is_authenticated),
                 "together": form.together.data,
                 "apart": form.separate.data,
                 "num_groups": form.num_groups.data,
                 "max_size": form.max_size.data,
             }
 
-            indiv = form_to_function(
-                    session["group_generation_form"]["names"], "individuals"
-                )
-            together = form_to_function(
-                    session["group_generation_form"]["together"], "groupings"
-                )
-            separate =form_to_function(
-                    session["group_generation_form"]["apart"], "groupings"
-                ) 
-            num_groups = form_to_function(
-                    session["group_generation_form"]["num_groups"], "integers"
-                )
-            max_size = form_to_function(
-                    session["group_generation_form"]["max_size"], "integers"
+            # Only charts from shared ?seed= links are worth caching; the rest
+            # are solved directly, so profiling still sees every phase
+            seed = request.args.get("seed", type=int)
+            cache = seed is not None
+            if seed is None:
+                seed = random.getrandbits(32)
+
+            try:
+                seating_chart = _generate_chart(
+                    indiv, session["group_generation_form"], seed, stats, cache
                 )
+            except InfeasibleError as e:
+                flash(str(e))
+                seating_chart = None
 
-            seating_chart = create_seating_chart(
-                names=indiv,
-                together=together,
-                apart=separate,
-                num_groups=num_groups,
-                max_size=max_size,
-            )
-            output_text = render_output(seating_chart)
+            # Only the seed is kept; /accept/ regenerates the same chart from it
+            session["group_generation_seed"] = seed if seating_chart else None
+            output_text = render_output(seating_chart or [])
 
-    return render_template(
-        "index.html", title="Home", form=form, output_text=output_text
+    response = make_response(
+        render_template(
+            "index.html",
+            title="Home",
+            form=form,
+            output_text=output_text,
+            loaded_group=session.get("loaded_group"),
+        )
     )
+    if stats is not None and stats.timings:
+        current_app.logger.info("create_seating_chart: %s", stats.as_dict())
+        response.headers["Server-Timing"] = stats.server_timing()
+    return response
 
 
 @bp.route("/user/<username>")
 @login_required
 def user(username):
     user = User.query.filter_by(username=username).first_or_404()
-    groups = user.groups.order_by(Group.creation_time.desc())
-    return render_template("user.html", user=user, groups=groups)
+    per_page = current_app.config["GROUPS_PER_PAGE"]
+
+    try:
+        before = _decode_cursor(request.args.get("before"))
+    except ValueError:
+        abort(404)
+
+    # Newest first, each group outer-joined to its config in the same query
+    query = (
+        db.session.query(Group, GroupConfig)
+        .outerjoin(GroupConfig, GroupConfig.group_id == Group.id)
+        .filter(Group.user_id == user.id)
+    )
+    if before is not None:
+        query = query.filter(
+            or_(
+                Group.creation_time < before[0],
+                and_(Group.creation_time == before[0], Group.id < before[1]),
+            )
+        )
+    groups = (
+        query.order_by(Group.creation_time.desc(), Group.id.desc())
+        .limit(per_page + 1)
+        .all()
+    )
+
+    next_cursor = None
+    if len(groups) > per_page:
+        groups = groups[:per_page]
+        next_cursor = _encode_cursor(groups[-1][0])
+
+    return render_template(
+        "user.html",
+        user=user,
+        groups=groups,
+        total=user.groups.count(),
+        next_cursor=next_cursor,
+        first_page=before is None,
+    )
+
+
+def _encode_cursor(group) -> str:
+    """Returns the `before` argument for the page after `group`"""
+    return "{:%Y-%m-%dT%H:%M:%S.%f}_{}".format(group.creation_time, group.id)
+
+
+def _decode_cursor(cursor):
+    """Returns (creation_time, id) from a `before` argument, or None"""
+    if not cursor:
+        return None
+    time, _, id = cursor.rpartition("_")
+    return datetime.strptime(time, "%Y-%m-%dT%H:%M:%S.%f"), int(id)
 
 
 @bp.route("/save/", methods=["GET", "POST"])
@@ -95,7 +173,8 @@ def save():
         flash("Need to log in")
         return redirect(url_for("main.index"))
 
-    if session["group_generation_form"] is None:
+    form_data = session.get("group_generation_form")
+    if form_data is None or form_names(form_data) is None:
         flash("No generated group data!")
         return redirect(url_for("main.index"))
 
@@ -108,31 +187,8 @@ def save():
         )
 
     if request.method == "POST":
-        if form.validate_on_submit() and session["group_generation_form"] is not None:
-            user = User.query.filter_by(username=current_user.username).first()
-
-            print(f"Names: {session['group_generation_form']['names']}")
-
-            group = Group(
-                title=form.title.data,
-                individuals=form_to_model(session["group_generation_form"]["names"], "individuals"),
-                indiv_display=store_display(session["group_generation_form"]["names"]),
-                creation_time=datetime.utcnow(),
-                user_id=user.id,
-            )
-            db.session.add(group)
-            db.session.commit()
-
-            groupconfig = GroupConfig(
-                pairs=form_to_model(session["group_generation_form"]["together"], "groupings"),
-                separated=form_to_model(session["group_generation_form"]["apart"], "groupings"),
-                max_size=session["group_generation_form"]["max_size"],
-                num_groups=session["group_generation_form"]["num_groups"],
-                user_id=user.id,
-                group_id=group.id,
-            )
-            db.session.add(groupconfig)
-            db.session.commit()
+        if form.validate_on_submit():
+            save_group(current_user.id, form.title.data, form_data)
 
             session["group_generation_form"] = None
             flash("Group saved!")
@@ -147,27 +203,97 @@ def delete(group):
     del_group = user.groups.filter_by(title=group).first()
     db.session.delete(del_group)
     db.session.commit()
+    invalidate_form(user.id, group)
     flash("Group removed!")
     return redirect(url_for("main.user", username=current_user.username))
 
 
 @bp.route("/load/<group>", methods=["GET"])
+@login_required
 def load(group):
-    user = User.query.filter_by(username=current_user.username).first_or_404()
-    group_obj = user.groups.filter_by(title=group).first()
-    group_config = group_obj.config.first()
-
-    session["group_generation_form"] = {
-        "names": model_to_form(group_obj.individuals, "individuals"),
-        "together": model_to_form(group_config.pairs, "groupings"),
-        "apart": model_to_form(group_config.separated, "groupings"),
-        "max_size": model_to_form(group_config.max_size, "integers"),
-        "num_groups": model_to_form(group_config.num_groups, "integers"),
-    }
+    form = load_form(current_user.id, group)
+    if form is None:
+        abort(404)
+
+    session["group_generation_form"] = form
+    session["loaded_group"] = group
     flash("Group successfully loaded!")
     return redirect(url_for("main.index"))
 
 
+@bp.route("/accept/", methods=["GET"])
+@login_required
+def accept():
+    form_data = session.get("group_generation_form")
+    seed = session.get("group_generation_seed")
+    names = None if form_data is None else form_names(form_data)
+
+    group_obj = _loaded_group(names)
+    if group_obj is None or names is None or seed is None:
+        flash("Load a saved group and generate groups first!")
+        return redirect(url_for("main.index"))
+
+    try:
+        chart = _generate_chart(names, form_data, seed)
+    except InfeasibleError as e:
+        flash(str(e))
+        return redirect(url_for("main.index"))
+
+    if group_obj.history is None:
+        group_obj.history = PairHistory()
+    group_obj.history.record(chart, names)
+    db.session.commit()
+
+    session["group_generation_seed"] = None
+    flash("Groups accepted! Future groups will mix these individuals.")
+    return redirect(url_for("main.index"))
+
+
+def _generate_chart(names, form_data, seed, stats=None, cache=False):
+    """Returns the chart for session form data, mixed with the loaded group's history
+
+    The chart only depends on its inputs and `seed`, so /accept/ can regenerate
+    the chart shown on the index page instead of keeping it in the session.
+    With `cache`, the chart comes from the backend's chart cache; either way
+    the same seed gives the same chart.
+    """
+    together = form_to_function(form_data["together"], "groupings")
+    separate = form_to_function(form_data["apart"], "groupings")
+    chart = create_seating_chart(
+        names=names,
+        together=together,
+        apart=separate,
+        num_groups=form_to_function(form_data["num_groups"], "integers"),
+        max_size=form_to_function(form_data["max_size"], "integers"),
+        seed=seed if cache else random.Random(seed),
+        stats=stats,
+    )
+
+    loaded = _loaded_group(names)
+    if loaded is not None and loaded.history is not None and chart:
+        history = loaded.history.as_history(names)
+        chart = mix_groups(chart, history, together, separate, rng=random.Random(seed))
+    return chart
+
+
+def _loaded_group(names=None):
+    """Returns the current user's group last loaded into the index page, or None
+
+    If `names` no longer match the group's roster, the user has moved on to
+    another class, so the loaded group is forgotten.
+    """
+    title = session.get("loaded_group")
+    if title is None or current_user.is_anonymous:
+        return None
+
+    group = Group.query.filter_by(user_id=current_user.id, title=title).first()
+    roster = None if names is None else ContentBlob.digest(json.dumps(names))
+    if group is None or (roster is not None and group.individuals_hash != roster):
+        session.pop("loaded_group", None)
+        return None
+    return group
+
+
 @bp.route("/about")
 def about():
     return render_template("about.html")
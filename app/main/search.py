@@ -0,0 +1,170 @@
+"""
+seatingchart.search
+~~~~~~~~~~~~~~~~~~~
+
+This module contains a best-of-N search that solves one `ChartProblem` many
+times across worker processes and keeps the most balanced chart.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, as_completed
+import random
+import threading
+import time
+
+from app.main.backend import ChartProblem
+
+# Worker processes shared by searches in this process, started on first use
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def score_chart(chart: list, max_size=float("Inf")) -> tuple:
+    """Scores a chart; lower is better
+
+    Args:
+        chart (list): Nested list with entries for each group
+        max_size (int, optional): Defaults to float("Inf"). Maximum size for a single group.
+
+    Returns:
+        tuple: Variance of group sizes, then negated free seats in the fullest group
+
+    Example:
+        >>> score_chart([["a", "b"], ["c", "d"], ["e"]], max_size=3)
+        (0.2222222222222222, -1)
+    """
+    sizes = [len(i) for i in chart]
+    if not sizes:
+        return (0.0, 0)
+
+    mean = sum(sizes) / len(sizes)
+    variance = sum((i - mean) ** 2 for i in sizes) / len(sizes)
+    slack = 0 if max_size == float("Inf") else max_size - max(sizes)
+    return (variance, -slack)
+
+
+def is_balanced(chart: list) -> bool:
+    """Returns True if group sizes differ by at most one"""
+    sizes = [len(i) for i in chart]
+    return not sizes or max(sizes) - min(sizes) <= 1
+
+
+def best_seating_chart(
+    problem: ChartProblem,
+    n=64,
+    workers=None,
+    chunksize=8,
+    budget=None,
+    seed=None,
+    executor=None,
+):
+    """Returns the best scoring of `n` randomized solves of `problem`
+
+    Seeds are split into chunks of `chunksize` and solved on a process pool.
+    The search returns early once a perfectly balanced chart is found, or when
+    `budget` seconds have passed. Without an `executor`, searches share one
+    pool per process, so worker start-up is paid once rather than per call.
+
+    Args:
+        problem (ChartProblem): Compiled roster and constraints
+        n (int, optional): Defaults to 64. Number of charts to try.
+        workers (int, optional): Defaults to None, one per core. Sizes the
+            shared pool when it is first started. Use 1 to solve in this process.
+        chunksize (int, optional): Defaults to 8. Solves per task.
+        budget (float, optional): Defaults to None. Wall-clock limit in seconds.
+        seed (int, optional): Defaults to None. Seed for reproducible searches.
+        executor (concurrent.futures.Executor, optional): Defaults to None.
+            Shared pool to submit to instead of starting one.
+
+    Returns:
+        list: Nested list with entries for each group
+    """
+    rng = random.Random(seed)
+    seeds = [rng.getrandbits(64) for _ in range(n)]
+    chunks = [seeds[i : i + chunksize] for i in range(0, n, chunksize)]
+    deadline = None if budget is None else time.monotonic() + budget
+
+    if workers == 1 and executor is None:
+        results = (_solve_chunk(problem, chunk, deadline) for chunk in chunks)
+        return _pick_best(results, deadline)
+
+    pool = executor or shared_pool(workers)
+    futures = [pool.submit(_solve_chunk, problem, chunk, deadline) for chunk in chunks]
+    try:
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        return _pick_best((f.result() for f in as_completed(futures, timeout)), None)
+    except TimeoutError:
+        done = [f.result() for f in futures if f.done() and not f.cancelled()]
+        if all(score is None for score, _ in done):
+            # Nothing solved within the budget, e.g. while a cold pool starts:
+            # wait for the first chart, as the in-process search would
+            done = _until_chart(f.result() for f in as_completed(futures))
+        return _pick_best(done, None)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def shared_pool(workers=None) -> ProcessPoolExecutor:
+    """Returns the process-wide pool, replacing it if a worker has died
+
+    Args:
+        workers (int, optional): Defaults to None, one per core. Only used
+            when a pool is started.
+    """
+    global _pool
+    with _pool_lock:
+        # A pool whose worker died rejects all further work
+        if _pool is None or getattr(_pool, "_broken", False):
+            _pool = ProcessPoolExecutor(max_workers=workers)
+        return _pool
+
+
+def _solve_chunk(problem: ChartProblem, seeds: list, deadline=None):
+    """Solves `problem` once per seed
+
+    Returns:
+        tuple: Best (score, chart) of the chunk, or (None, error message)
+    """
+    best, error = None, None
+    for seed in seeds:
+        if deadline is not None and time.monotonic() > deadline and best is not None:
+            break
+        try:
+            chart = problem.solve(random.Random(seed))
+        except ValueError as e:
+            error = str(e)
+            continue
+
+        score = score_chart(chart, problem.max_size)
+        if best is None or score < best[0]:
+            best = (score, chart)
+        if is_balanced(best[1]):
+            break
+
+    return best if best is not None else (None, error)
+
+
+def _until_chart(results):
+    """Yields chunk results up to and including the first with a chart"""
+    for result in results:
+        yield result
+        if result[0] is not None:
+            return
+
+
+def _pick_best(results, deadline):
+    best, error = None, "No charts were generated"
+    for score, chart in results:
+        if score is None:
+            error = chart
+            continue
+        if best is None or score < best[0]:
+            best = (score, chart)
+        if is_balanced(best[1]):
+            break
+        if deadline is not None and time.monotonic() > deadline:
+            break
+
+    if best is None:
+        raise ValueError(error)
+    return best[1]
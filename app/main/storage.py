@@ -0,0 +1,318 @@
+"""
+seatingchart.storage
+~~~~~~~~~~~~~~~~~~~~
+
+This module contains the save and load paths for groups, turning the index
+page's form data into `Group` and `GroupConfig` rows and back.
+"""
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import threading
+import time
+
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.models import ContentBlob, Group, GroupConfig
+from app.main.backend import (
+    form_to_function,
+    form_to_model,
+    model_to_form,
+    store_display,
+)
+
+# Loaded form data kept by each process, and seconds before an entry expires
+LOAD_CACHE_SIZE = 512
+LOAD_CACHE_TTL = 600
+
+# Longest roster text, in characters, kept in the session cookie itself
+SESSION_ROSTER_CHARS = 2000
+
+# Text columns kept in `ContentBlob` and referenced by a `<name>_hash` column
+_BLOB_COLUMNS = {"individuals", "pairs", "separated"}
+
+
+class _TTLCache(object):
+    """Thread-safe LRU cache whose entries also expire `ttl` seconds after they
+    were stored"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+_load_cache = _TTLCache(LOAD_CACHE_SIZE, LOAD_CACHE_TTL)
+
+
+def build_group(user_id: int, title: str, form: dict) -> Group:
+    """Returns an unsaved group and its config from index page form data
+
+    The config is attached through `GroupConfig.group`, so both rows are
+    inserted by the same flush with the foreign key filled in. Their content
+    blobs are looked up and any missing ones inserted in one batch, so call
+    this inside the transaction that saves the group.
+
+    Args:
+        user_id (int): Id of the saving user
+        title (str): Title of the group
+        form (dict): Form data, as kept in `session["group_generation_form"]`.
+            The roster is either a `roster` hash or `names` text.
+
+    Returns:
+        Group: New group, with its config in `group.config`
+    """
+    group_row = _group_row(user_id, title, form, datetime.utcnow())
+    config_row = _config_row(user_id, form)
+    _store_blobs([group_row, config_row])
+
+    group = Group(**group_row)
+    GroupConfig(group=group, **config_row)
+    return group
+
+
+def save_group(user_id: int, title: str, form: dict) -> Group:
+    """Saves a group and its config in a single transaction
+
+    Args:
+        user_id (int): Id of the saving user
+        title (str): Title of the group
+        form (dict): Form data, as kept in `session["group_generation_form"]`
+
+    Returns:
+        Group: Saved group
+    """
+    with _transaction():
+        group = build_group(user_id, title, form)
+        db.session.add(group)
+    invalidate_form(user_id, title)
+    return group
+
+
+def save_groups(user_id: int, entries: list) -> list:
+    """Saves many groups and their configs in a single transaction, for imports
+
+    Rows are written with bulk inserts rather than ORM objects: one batch for
+    new content blobs, one for the groups, then one executemany for all
+    configs. If any row fails, none are saved.
+
+    Args:
+        user_id (int): Id of the saving user
+        entries (list): (title, form data) pairs
+
+    Returns:
+        list: Ids of the saved groups, in the order of `entries`
+
+    Example:
+        >>> save_groups(user.id, [("Period 1", form_1), ("Period 2", form_2)])
+        [12, 13]
+    """
+    now = datetime.utcnow()
+    groups = [_group_row(user_id, title, form, now) for title, form in entries]
+    configs = [_config_row(user_id, form) for _, form in entries]
+
+    with _transaction():
+        _store_blobs(groups + configs)
+        db.session.bulk_insert_mappings(Group, groups, return_defaults=True)
+        for group, config in zip(groups, configs):
+            config["group_id"] = group["id"]
+        db.session.bulk_insert_mappings(GroupConfig, configs)
+    for title, _ in entries:
+        invalidate_form(user_id, title)
+    return [group["id"] for group in groups]
+
+
+def session_roster(names: list, stash: bool) -> dict:
+    """Returns the session form data entry that keeps a roster
+
+    Rosters that fit are kept in the cookie as `names` text. Longer ones are
+    stored with `stash_roster` and only their hash is kept, but only when
+    `stash` is set: stashed rosters are never deleted, so only rosters that
+    may be saved or accepted belong there.
+
+    Args:
+        names (list): Individuals, as parsed from the form or an upload
+        stash (bool): Whether a roster too long for the cookie may be stored
+
+    Returns:
+        dict: `names` or `roster`, or nothing if the roster is dropped
+    """
+    text = "\n".join(names)
+    if len(text) <= SESSION_ROSTER_CHARS:
+        return {"names": text}
+    if stash:
+        return {"roster": stash_roster(names)}
+    return {}
+
+
+def stash_roster(names: list) -> str:
+    """Stores a parsed roster in the blob store and returns its hash
+
+    Rosters can hold thousands of names, far more than fits in a cookie, so
+    the session keeps this hash instead of the names.
+
+    Args:
+        names (list): Individuals, as parsed from the form or an upload
+
+    Returns:
+        str: Hash of the roster, for `roster_names` and `Group.individuals_hash`
+    """
+    with _transaction():
+        blob = ContentBlob.for_text(json.dumps(names))
+    return blob.hash
+
+
+def roster_names(roster_hash: str) -> list:
+    """Returns the names of a roster stored by `stash_roster`, or None"""
+    blob = ContentBlob.query.get(roster_hash) if roster_hash else None
+    return None if blob is None else json.loads(blob.text)
+
+
+def form_names(form: dict) -> list:
+    """Returns the roster of session form data, or None if it was not kept
+
+    Form data holds either a `roster` hash or `names` text, which is also all
+    that sessions from before rosters were stashed have.
+    """
+    if form.get("roster") is not None:
+        return roster_names(form["roster"])
+    if form.get("names") is not None:
+        return form_to_function(form["names"], "individuals")
+    return None
+
+
+def load_form(user_id: int, title: str):
+    """Returns the form data of a saved group, or None if there is no such group
+
+    Decoded form data is cached in this process for `LOAD_CACHE_TTL` seconds,
+    so loading the same group again skips the database. Other processes only
+    see a save or delete once their entry expires.
+
+    Args:
+        user_id (int): Id of the group's owner
+        title (str): Title of the group
+
+    Returns:
+        dict: Form data, as kept in `session["group_generation_form"]`
+    """
+    key = (user_id, title)
+    form = _load_cache.get(key)
+    if form is None:
+        row = (
+            db.session.query(Group, GroupConfig)
+            .join(GroupConfig, GroupConfig.group_id == Group.id)
+            .filter(Group.user_id == user_id, Group.title == title)
+            .options(
+                joinedload(GroupConfig.pairs_blob),
+                joinedload(GroupConfig.separated_blob),
+            )
+            .first()
+        )
+        if row is None:
+            return None
+
+        group, config = row
+        form = {
+            "roster": group.individuals_hash,
+            "together": model_to_form(config.pairs, "groupings"),
+            "apart": model_to_form(config.separated, "groupings"),
+            "max_size": model_to_form(config.max_size, "integers"),
+            "num_groups": model_to_form(config.num_groups, "integers"),
+        }
+        _load_cache.put(key, form)
+    return dict(form)
+
+
+def invalidate_form(user_id: int, title: str):
+    """Drops a group's cached form data after it is saved or deleted"""
+    _load_cache.pop((user_id, title))
+
+
+def load_cache_info() -> dict:
+    """Returns hit/miss counters and size of the loaded form cache"""
+    return {
+        "hits": _load_cache.hits,
+        "misses": _load_cache.misses,
+        "size": len(_load_cache._entries),
+        "maxsize": _load_cache.maxsize,
+    }
+
+
+def clear_load_cache():
+    """Empties the loaded form cache and resets its counters"""
+    _load_cache.clear()
+
+
+def _group_row(user_id, title, form, creation_time) -> dict:
+    names = form_names(form)
+    return {
+        "title": title,
+        "individuals": json.dumps(names),
+        "indiv_display": store_display("\n".join(names)),
+        "creation_time": creation_time,
+        "user_id": user_id,
+    }
+
+
+def _config_row(user_id, form) -> dict:
+    return {
+        "pairs": form_to_model(form["together"], "groupings"),
+        "separated": form_to_model(form["apart"], "groupings"),
+        "max_size": form["max_size"],
+        "num_groups": form["num_groups"],
+        "user_id": user_id,
+    }
+
+
+def _store_blobs(rows):
+    """Replaces the text columns of `rows` with the hashes of their blobs,
+    inserting any missing blobs in one batch"""
+    texts = [row[k] for row in rows for k in _BLOB_COLUMNS if k in row]
+    hashes = ContentBlob.store_many(texts)
+    for row in rows:
+        for key in _BLOB_COLUMNS.intersection(row):
+            row[key + "_hash"] = hashes.get(row.pop(key))
+
+
+@contextmanager
+def _transaction():
+    """Commits the session on exit, or rolls it back if anything raised"""
+    try:
+        yield
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
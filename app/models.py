@@ -1,12 +1,19 @@
 from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from datetime import datetime
-from hashlib import md5
+from hashlib import md5, sha256
 import jwt
+import zlib
 from time import time
 from flask import current_app
+from sqlalchemy.dialects import postgresql
 from app import db, login
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 
 class User(UserMixin, db.Model):
     __tablename__ = "user"
@@ -59,29 +66,218 @@ def load_user(id):
 
 class Group(db.Model):
     __tablename__ = "group"
+    __table_args__ = (
+        db.Index("ix_group_user_id_title", "user_id", "title", unique=True),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String)
-    individuals = db.Column(db.String)
+    individuals_hash = db.Column(db.String(64), db.ForeignKey("contentblob.hash"))
     indiv_display = db.Column(db.String)
     creation_time = db.Column(db.DateTime, index=True, default=datetime.utcnow)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
     config = db.relationship("GroupConfig", backref="group", lazy="dynamic")
+    history = db.relationship(
+        "PairHistory", backref="group", uselist=False, cascade="all, delete-orphan"
+    )
+    individuals_blob = db.relationship("ContentBlob", foreign_keys=[individuals_hash])
 
     def __repr__(self):
         return "<Group {} - {}>".format(self.user_id, self.creation_time)
 
+    @property
+    def individuals(self):
+        """JSON list of names, loaded from its `ContentBlob`"""
+        return ContentBlob.text_of(self.individuals_blob)
+
+    @individuals.setter
+    def individuals(self, text):
+        self.individuals_blob = ContentBlob.for_text(text)
+
 
 class GroupConfig(db.Model):
     __tablename__ = "groupconfig"
 
     id = db.Column(db.Integer, primary_key=True)
-    pairs = db.Column(db.String)
-    separated = db.Column(db.String)
+    pairs_hash = db.Column(db.String(64), db.ForeignKey("contentblob.hash"))
+    separated_hash = db.Column(db.String(64), db.ForeignKey("contentblob.hash"))
     max_size = db.Column(db.Integer)
     num_groups = db.Column(db.Integer)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id"))
-    group_id = db.Column(db.Integer, db.ForeignKey("group.id"))
+    group_id = db.Column(db.Integer, db.ForeignKey("group.id"), index=True)
+    pairs_blob = db.relationship("ContentBlob", foreign_keys=[pairs_hash])
+    separated_blob = db.relationship("ContentBlob", foreign_keys=[separated_hash])
 
     def __repr__(self):
         return "<GroupConfig {} - {}>".format(self.user_id, self.group_id)
+
+    @property
+    def pairs(self):
+        """JSON list of together groups, loaded from its `ContentBlob`"""
+        return ContentBlob.text_of(self.pairs_blob)
+
+    @pairs.setter
+    def pairs(self, text):
+        self.pairs_blob = ContentBlob.for_text(text)
+
+    @property
+    def separated(self):
+        """JSON list of apart groups, loaded from its `ContentBlob`"""
+        return ContentBlob.text_of(self.separated_blob)
+
+    @separated.setter
+    def separated(self, text):
+        self.separated_blob = ContentBlob.for_text(text)
+
+
+class ContentBlob(db.Model):
+    """Deduplicated, zlib-compressed text, keyed by the SHA-256 of the text
+
+    Rosters and constraint sets are stored here once, however many saved
+    groups share them, and referenced by hash. Blobs are immutable.
+    """
+
+    __tablename__ = "contentblob"
+
+    hash = db.Column(db.String(64), primary_key=True)
+    size = db.Column(db.Integer)
+    data = db.Column(db.LargeBinary)
+
+    def __repr__(self):
+        return "<ContentBlob {}>".format(self.hash[:12])
+
+    @property
+    def text(self):
+        return zlib.decompress(self.data).decode("utf-8")
+
+    @staticmethod
+    def text_of(blob):
+        return None if blob is None else blob.text
+
+    @staticmethod
+    def digest(text):
+        return sha256(text.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def encode(cls, text):
+        """Returns the column values of the blob holding `text`"""
+        raw = text.encode("utf-8")
+        return {"hash": cls.digest(text), "size": len(raw), "data": zlib.compress(raw)}
+
+    @classmethod
+    def for_text(cls, text):
+        """Returns the blob holding `text`, inserting it first if needed"""
+        if text is None:
+            return None
+        blob = cls.query.get(cls.digest(text))
+        if blob is None:
+            cls._insert([cls.encode(text)])
+            blob = cls.query.get(cls.digest(text))
+        return blob
+
+    @classmethod
+    def store_many(cls, texts):
+        """Inserts any missing blobs for `texts` in one batch
+
+        Returns:
+            dict: Hash of each text
+        """
+        hashes = {text: cls.digest(text) for text in set(texts) if text is not None}
+        existing = set(
+            h
+            for (h,) in db.session.query(cls.hash).filter(
+                cls.hash.in_(list(hashes.values()))
+            )
+        )
+        missing = {h: text for text, h in hashes.items() if h not in existing}
+        if missing:
+            cls._insert([cls.encode(text) for text in missing.values()])
+        return hashes
+
+    @classmethod
+    def _insert(cls, rows):
+        """Inserts blob rows, skipping any another transaction inserted first
+
+        Blobs are keyed by content, so two requests saving the same text can
+        both miss it and race to insert it. The loser's row is dropped by the
+        database instead of failing the request with an IntegrityError.
+        """
+        if db.session.get_bind(cls).dialect.name == "postgresql":
+            statement = postgresql.insert(cls.__table__).on_conflict_do_nothing()
+        else:
+            statement = (
+                cls.__table__.insert()
+                .prefix_with("OR IGNORE", dialect="sqlite")
+                .prefix_with("IGNORE", dialect="mysql")
+            )
+        db.session.execute(statement, rows)
+
+
+class PairHistory(db.Model):
+    """Times each pair of a saved group's roster has been grouped together
+
+    Counts are the upper triangle (row-major, diagonal excluded) of an n x n
+    co-occurrence matrix over the roster in `Group.individuals`, packed as
+    little-endian uint16 in a single binary column.
+    """
+
+    __tablename__ = "pairhistory"
+
+    id = db.Column(db.Integer, primary_key=True)
+    size = db.Column(db.Integer)
+    counts = db.Column(db.LargeBinary)
+    update_time = db.Column(db.DateTime, default=datetime.utcnow)
+    group_id = db.Column(db.Integer, db.ForeignKey("group.id"), index=True, unique=True)
+
+    def __repr__(self):
+        return "<PairHistory {} - {}>".format(self.group_id, self.update_time)
+
+    def to_array(self):
+        """Returns the packed counts as a read-only NumPy array, without copying"""
+        return np.frombuffer(self.counts, dtype="<u2")
+
+    def as_history(self, names: list) -> dict:
+        """Returns non-zero counts keyed by frozenset({name_1, name_2})
+
+        Args:
+            names (list): Roster the counts were recorded against
+        """
+        counts = self.to_array()
+        n, k = self.size, np.flatnonzero(counts)
+        # Invert k = i * n - i * (i + 1) / 2 + j - i - 1 for the non-zero
+        # counts only, rather than building every (i, j) of the triangle
+        rows = n - 2 - ((np.sqrt(4 * n * (n - 1) - 8 * k - 7) - 1) // 2).astype(np.intp)
+        cols = k + rows + 1 - n * (n - 1) // 2 + (n - rows) * (n - rows - 1) // 2
+        return {
+            frozenset((names[i], names[j])): int(c)
+            for i, j, c in zip(rows, cols, counts[k])
+        }
+
+    def record(self, chart: list, names: list):
+        """Adds one to the count of every pair seated together in `chart`
+
+        The counts column is rewritten once, so each accepted chart is a single
+        UPDATE. Names missing from `names` are ignored.
+
+        Args:
+            chart (list): Nested list with entries for each group
+            names (list): Roster the counts are recorded against
+        """
+        if self.size != len(names) or self.counts is None:
+            self.size = len(names)
+            self.counts = bytes(2 * (self.size * (self.size - 1) // 2))
+
+        position = {name: i for i, name in enumerate(names)}
+        counts = self.to_array().copy()
+        for group in chart:
+            members = np.sort(
+                np.array([position[i] for i in group if i in position], dtype=np.intp)
+            )
+            if len(members) < 2:
+                continue
+            rows, cols = np.triu_indices(len(members), 1)
+            i, j = members[rows], members[cols]
+            np.add.at(counts, i * self.size - i * (i + 1) // 2 + j - i - 1, 1)
+
+        self.counts = counts.tobytes()
+        self.update_time = datetime.utcnow()
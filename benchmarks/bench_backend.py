@@ -0,0 +1,189 @@
+"""
+benchmarks.bench_backend
+~~~~~~~~~~~~~~~~~~~~~~~~
+
+Scaling benchmarks for `app.main.backend`.
+
+Synthetic rosters are generated over a grid of roster sizes, together/apart
+pair densities, `max_size` and `num_groups`. Each backend phase is timed on its
+own and the results are written as JSON, so runs from different commits can be
+compared.
+
+Usage:
+    python -m benchmarks.bench_backend --output bench.json
+    python -m benchmarks.bench_backend --quick
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.main import backend  # noqa: E402
+
+GRID = {
+    "names": [50, 500, 5000],
+    "together_density": [0.0, 0.1, 0.4],
+    "apart_density": [0.0, 0.05, 0.2],
+    "max_size": [4, float("Inf")],
+    "num_groups": [float("Inf"), 10],
+}
+
+QUICK_GRID = {
+    "names": [50, 500],
+    "together_density": [0.1],
+    "apart_density": [0.05],
+    "max_size": [4],
+    "num_groups": [float("Inf")],
+}
+
+
+def synthetic_roster(names, together_density, apart_density, seed=0):
+    """Returns a random roster with together and apart pairs
+
+    Args:
+        names (int): Number of individuals
+        together_density (float): Together pairs per individual
+        apart_density (float): Apart pairs per individual
+        seed (int, optional): Defaults to 0. Seed for the generator
+
+    Returns:
+        tuple: Names, together pairs and apart pairs
+    """
+    rng = random.Random(seed)
+    roster = [f"person_{i}" for i in range(names)]
+    together = [rng.sample(roster, 2) for _ in range(int(names * together_density))]
+
+    # Keep apart pairs out of together components, so inputs are consistent
+    component = {}
+    for i, group in enumerate(backend._create_groups(together)):
+        for name in group:
+            component[name] = i
+    apart = []
+    while len(apart) < int(names * apart_density):
+        pair = rng.sample(roster, 2)
+        if component.get(pair[0], pair[0]) != component.get(pair[1], pair[1]):
+            apart.append(pair)
+
+    return roster, together or None, apart or None
+
+
+def time_call(func, repeat, setup=None):
+    """Returns the best wall time of `repeat` calls to `func`, in seconds"""
+    best = float("Inf")
+    for _ in range(repeat):
+        args = setup() if setup is not None else ()
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_case(names, together_density, apart_density, max_size, num_groups, repeat):
+    """Times each backend phase on one synthetic roster
+
+    Returns:
+        dict: Parameters, and seconds per phase (None if the phase raised)
+    """
+    roster, together, apart = synthetic_roster(names, together_density, apart_density)
+    groups = backend._create_groups(together)
+    result = {
+        "names": names,
+        "together_density": together_density,
+        "apart_density": apart_density,
+        "max_size": _jsonable(max_size),
+        "num_groups": _jsonable(num_groups),
+        "together_pairs": len(together or []),
+        "apart_pairs": len(apart or []),
+    }
+
+    def separated():
+        return backend._separate_individuals(groups, apart, max_size)
+
+    def balance_setup():
+        chart = separated()
+        placed = set(itertools.chain(*chart))
+        return chart, [i for i in roster if i not in placed]
+
+    def balance(chart, remaining):
+        # One balancer for the whole roster, as `create_seating_chart` uses it
+        balancer = backend._Balancer(chart, max_size=max_size, num_groups=num_groups)
+        for student in remaining:
+            balancer.add(student)
+
+    phases = {
+        "create_seating_chart": lambda: backend.create_seating_chart(
+            roster, together, apart, max_size, num_groups
+        ),
+        "_create_groups": lambda: backend._create_groups(together),
+        "_separate_individuals": separated,
+        "_Balancer": (balance, balance_setup),
+    }
+    for phase, func in phases.items():
+        func, setup = func if isinstance(func, tuple) else (func, None)
+        try:
+            result[phase] = time_call(func, repeat, setup)
+        except ValueError:
+            result[phase] = None
+
+    return result
+
+
+def run(grid, repeat=3):
+    """Returns benchmark results for every combination of `grid` parameters"""
+    keys = ["names", "together_density", "apart_density", "max_size", "num_groups"]
+    return [
+        bench_case(*params, repeat=repeat)
+        for params in itertools.product(*[grid[k] for k in keys])
+    ]
+
+
+def _jsonable(value):
+    return None if value == float("Inf") else value
+
+
+def _git_commit():
+    try:
+        return (
+            subprocess.check_output(
+                ["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL
+            )
+            .decode("utf-8")
+            .strip()
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--repeat", type=int, default=3, help="Calls per phase")
+    parser.add_argument("--quick", action="store_true", help="Run a small grid")
+    args = parser.parse_args(argv)
+
+    results = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "results": run(QUICK_GRID if args.quick else GRID, repeat=args.repeat),
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,15 @@ class Config(object):
     #   or "sqlite:///" + os.path.join(basedir, "app.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     LOG_TO_STDOUT = os.environ.get("LOG_TO_STDOUT")
+    PROFILE_BACKEND = os.environ.get("PROFILE_BACKEND") is not None
+    GROUPS_PER_PAGE = 25
+    BULK_WORKERS = int(os.environ.get("BULK_WORKERS") or 0) or None
+    BULK_MAX_CHARTS = int(os.environ.get("BULK_MAX_CHARTS") or 1000)
+    JOB_BACKEND = os.environ.get("JOB_BACKEND") or "sqlite"
+    JOB_DATABASE = os.environ.get("JOB_DATABASE") or os.path.join(basedir, "jobs.db")
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS") or 2)
+    JOB_TTL = int(os.environ.get("JOB_TTL") or 3600)
+    JOB_MAX_PENDING = int(os.environ.get("JOB_MAX_PENDING") or 100)
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
     MAIL_PORT = int(os.environ.get("MAIL_PORT") or 25)
     MAIL_USE_TLS = os.environ.get("MAIL_USE_TLS") is not None
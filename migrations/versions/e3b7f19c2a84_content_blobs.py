@@ -0,0 +1,161 @@
+"""content blobs
+
+Revision ID: e3b7f19c2a84
+Revises: 9a41c7e2d6f0
+Create Date: 2026-10-18 11:48:22.630915
+
+"""
+from hashlib import sha256
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3b7f19c2a84'
+down_revision = '9a41c7e2d6f0'
+branch_labels = None
+depends_on = None
+
+# Rows read and written per backfill round trip
+BATCH_SIZE = 500
+
+contentblob = sa.table('contentblob',
+    sa.column('hash', sa.String),
+    sa.column('size', sa.Integer),
+    sa.column('data', sa.LargeBinary),
+)
+
+# (table, text column, hash column) pairs that move into `contentblob`
+COLUMNS = [
+    ('group', 'individuals', 'individuals_hash'),
+    ('groupconfig', 'pairs', 'pairs_hash'),
+    ('groupconfig', 'separated', 'separated_hash'),
+]
+
+
+def upgrade():
+    op.create_table('contentblob',
+    sa.Column('hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=True),
+    sa.Column('data', sa.LargeBinary(), nullable=True),
+    sa.PrimaryKeyConstraint('hash')
+    )
+    with op.batch_alter_table('group') as batch_op:
+        batch_op.add_column(sa.Column('individuals_hash', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_group_individuals_hash', 'contentblob', ['individuals_hash'], ['hash'])
+    with op.batch_alter_table('groupconfig') as batch_op:
+        batch_op.add_column(sa.Column('pairs_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('separated_hash', sa.String(length=64), nullable=True))
+        batch_op.create_foreign_key('fk_groupconfig_pairs_hash', 'contentblob', ['pairs_hash'], ['hash'])
+        batch_op.create_foreign_key('fk_groupconfig_separated_hash', 'contentblob', ['separated_hash'], ['hash'])
+
+    conn = op.get_bind()
+    for table_name, text_name, hash_name in COLUMNS:
+        _backfill(conn, table_name, text_name, hash_name)
+
+    with op.batch_alter_table('groupconfig') as batch_op:
+        batch_op.drop_column('separated')
+        batch_op.drop_column('pairs')
+    with op.batch_alter_table('group') as batch_op:
+        batch_op.drop_column('individuals')
+
+
+def downgrade():
+    with op.batch_alter_table('group') as batch_op:
+        batch_op.add_column(sa.Column('individuals', sa.String(), nullable=True))
+    with op.batch_alter_table('groupconfig') as batch_op:
+        batch_op.add_column(sa.Column('pairs', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('separated', sa.String(), nullable=True))
+
+    conn = op.get_bind()
+    for table_name, text_name, hash_name in COLUMNS:
+        _restore(conn, table_name, text_name, hash_name)
+
+    with op.batch_alter_table('groupconfig') as batch_op:
+        batch_op.drop_constraint('fk_groupconfig_separated_hash', type_='foreignkey')
+        batch_op.drop_constraint('fk_groupconfig_pairs_hash', type_='foreignkey')
+        batch_op.drop_column('separated_hash')
+        batch_op.drop_column('pairs_hash')
+    with op.batch_alter_table('group') as batch_op:
+        batch_op.drop_constraint('fk_group_individuals_hash', type_='foreignkey')
+        batch_op.drop_column('individuals_hash')
+    op.drop_table('contentblob')
+
+
+def _batches(conn, table_name, column_name):
+    """Yields (id, column) rows of `table_name` in id order, BATCH_SIZE at a time"""
+    query = sa.text(
+        'SELECT id, {1} FROM "{0}" WHERE id > :last_id ORDER BY id LIMIT :limit'
+        .format(table_name, column_name)
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(query, {'last_id': last_id, 'limit': BATCH_SIZE}).fetchall()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+        yield rows
+
+
+def _blobs(conn, digests, columns):
+    """Returns `columns` of the content blobs whose hash is in `digests`"""
+    query = sa.text(
+        'SELECT {} FROM contentblob WHERE hash IN :digests'.format(', '.join(columns))
+    ).bindparams(sa.bindparam('digests', expanding=True))
+    return conn.execute(query, {'digests': list(digests)}).fetchall() if digests else []
+
+
+def _backfill(conn, table_name, text_name, hash_name):
+    table = sa.table(table_name,
+        sa.column('id', sa.Integer),
+        sa.column(text_name, sa.String),
+        sa.column(hash_name, sa.String),
+    )
+    for rows in _batches(conn, table_name, text_name):
+        blobs, updates = {}, []
+        for id, text in rows:
+            if text is None:
+                continue
+            raw = text.encode('utf-8')
+            digest = sha256(raw).hexdigest()
+            blobs[digest] = {'hash': digest, 'size': len(raw), 'data': zlib.compress(raw)}
+            updates.append({'row_id': id, 'digest': digest})
+
+        existing = set(digest for (digest,) in _blobs(conn, blobs, ['hash']))
+        missing = [blob for digest, blob in blobs.items() if digest not in existing]
+        if missing:
+            conn.execute(contentblob.insert(), missing)
+        if updates:
+            conn.execute(
+                table.update()
+                .where(table.c.id == sa.bindparam('row_id'))
+                .values({hash_name: sa.bindparam('digest')}),
+                updates,
+            )
+
+
+def _restore(conn, table_name, text_name, hash_name):
+    table = sa.table(table_name,
+        sa.column('id', sa.Integer),
+        sa.column(text_name, sa.String),
+        sa.column(hash_name, sa.String),
+    )
+    for rows in _batches(conn, table_name, hash_name):
+        digests = set(digest for _, digest in rows if digest is not None)
+        texts = {
+            digest: zlib.decompress(data).decode('utf-8')
+            for digest, data in _blobs(conn, digests, ['hash', 'data'])
+        }
+        updates = [
+            {'row_id': id, 'text': texts[digest]}
+            for id, digest in rows if digest is not None
+        ]
+        if updates:
+            conn.execute(
+                table.update()
+                .where(table.c.id == sa.bindparam('row_id'))
+                .values({text_name: sa.bindparam('text')}),
+                updates,
+            )
@@ -4,3 +4,12 @@ import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import app
+from config import Config
+
+
+class TestConfig(Config):
+    TESTING = True
+    LOG_TO_STDOUT = True
+    SQLALCHEMY_DATABASE_URI = "sqlite://"
+    WTF_CSRF_ENABLED = False
+    JOB_BACKEND = "memory"
@@ -0,0 +1,149 @@
+from .context import app, TestConfig
+from concurrent.futures import ThreadPoolExecutor
+import json
+import unittest
+from unittest import mock
+
+import app.main.api
+import app.main.jobs
+
+
+class Api_Test(unittest.TestCase):
+    """Test cases for the seatingchart.api module"""
+
+    def test_chart_arguments(self):
+        kwargs = app.main.api.chart_arguments(
+            {
+                "names": ["Amy", "Bob", "Carly"],
+                "together": [["Amy", "Bob"]],
+                "apart": [],
+                "max_size": 0,
+                "num_groups": 2,
+                "seed": 3,
+            }
+        )
+        assert kwargs == {
+            "names": ["Amy", "Bob", "Carly"],
+            "together": [["Amy", "Bob"]],
+            "apart": None,
+            "max_size": float("Inf"),
+            "num_groups": 2,
+            "seed": 3,
+        }
+
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments(None)
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": "Amy"})
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": ["Amy"], "apart": ["Amy"]})
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": ["Amy"], "apart": [["Amy"]]})
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": ["Amy"], "together": [[]]})
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": ["Amy"], "apart": [["Amy", "Amy"]]})
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": ["Amy"], "max_size": -1})
+        with self.assertRaises(ValueError):
+            app.main.api.chart_arguments({"names": ["Amy"], "seed": True})
+
+    def test_solve_chart(self):
+        kwargs = {"names": ["Amy", "Bob", "Carly"], "max_size": 2, "seed": 0}
+        result = app.main.api.solve_chart(kwargs, index=4)
+        assert result["index"] == 4
+        assert sorted(len(i) for i in result["groups"]) == [1, 2]
+
+        kwargs = {"names": ["Amy", "Bob"], "together": [["Amy", "Bob"]], "max_size": 1}
+        result = app.main.api.solve_chart(kwargs)
+        assert "groups" not in result
+        assert result["constraint"] == ["Amy", "Bob"]
+
+
+class Api_Client_Test(unittest.TestCase):
+    """Test cases for the JSON endpoints, through the Flask test client"""
+
+    names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank"]
+
+    def setUp(self):
+        self.app = app.create_app(TestConfig)
+        self.client = self.app.test_client()
+
+    def test_generate(self):
+        body = {"names": self.names, "apart": [["Amy", "Bob"]], "max_size": 2}
+        response = self.client.post("/api/generate", json=body)
+        assert response.status_code == 200
+        groups = response.get_json()["groups"]
+        assert sorted(sum(groups, [])) == sorted(self.names)
+        assert all(len(group) <= 2 for group in groups)
+        assert "Set-Cookie" not in response.headers
+
+        body = {"names": self.names, "together": [[]], "engine": "numpy"}
+        response = self.client.post("/api/generate", json=body)
+        assert response.status_code == 400
+        assert "pairs" in response.get_json()["error"]
+
+        body = {"names": ["Amy", "Bob"], "together": [["Amy", "Bob"]], "max_size": 1}
+        response = self.client.post("/api/generate", json=body)
+        assert response.status_code == 400
+        assert response.get_json()["constraint"] == ["Amy", "Bob"]
+
+    def test_generate_bulk(self):
+        charts = [
+            {"names": self.names, "max_size": 3},
+            {"names": "Amy"},
+            {"names": ["Amy", "Bob"], "together": [["Amy", "Bob"]], "max_size": 1},
+        ]
+        response = self.client.post("/api/generate/bulk", json={"charts": charts})
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+
+        lines = [json.loads(i) for i in response.get_data(as_text=True).splitlines()]
+        results = {line["index"]: line for line in lines}
+        assert sorted(results) == [0, 1, 2]
+        assert sorted(sum(results[0]["groups"], [])) == sorted(self.names)
+        assert "error" in results[1]
+        assert results[2]["constraint"] == ["Amy", "Bob"]
+
+    def test_generate_bulk_worker_error(self):
+        def solve_chart(kwargs, index=None):
+            if index == 1:
+                raise IndexError("worker failed")
+            return {"groups": [kwargs["names"]], "index": index}
+
+        charts = [{"names": ["Amy", "Bob"]}] * 3
+        with ThreadPoolExecutor(max_workers=1) as pool, mock.patch(
+            "app.main.api.shared_pool", return_value=pool
+        ), mock.patch("app.main.api.solve_chart", solve_chart):
+            response = self.client.post("/api/generate/bulk", json={"charts": charts})
+            lines = [
+                json.loads(i) for i in response.get_data(as_text=True).splitlines()
+            ]
+
+        results = {line["index"]: line for line in lines}
+        assert sorted(results) == [0, 1, 2]
+        assert results[1] == {"error": "worker failed", "index": 1}
+        assert results[2]["groups"] == [["Amy", "Bob"]]
+
+    def test_jobs(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        self.app.extensions["jobs"] = app.main.jobs.JobQueue(executor=executor)
+
+        response = self.client.post("/api/jobs", json={"names": self.names})
+        assert response.status_code == 202
+        job = response.get_json()
+        assert job["status"] == "pending"
+
+        executor.shutdown(wait=True)
+        response = self.client.get(response.headers["Location"])
+        assert response.status_code == 200
+        result = response.get_json()
+        assert (result["id"], result["status"]) == (job["id"], "done")
+        assert sorted(sum(result["groups"], [])) == sorted(self.names)
+
+        assert self.client.post("/api/jobs", json={"names": 1}).status_code == 400
+        assert self.client.get("/api/jobs/missing").status_code == 404
+
+
+if __name__ == "__main__":
+    unittest.main()
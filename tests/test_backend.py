@@ -1,6 +1,13 @@
 from .context import app
+import io
+import random
 import unittest
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Backend_Test(unittest.TestCase):
     """Test cases for the seatingchart.backend module"""
@@ -15,6 +22,13 @@ class Backend_Test(unittest.TestCase):
         groups = app.main.backend._create_groups(None)
         assert groups == []
 
+        groups = app.main.backend._create_groups(
+            [["Amy", "Bob"], ["Carly", "Dan"], ["Eesha", "Frank"], ["Bob", "Carly"]]
+        )
+        assert len(groups) == 2
+        assert sorted(groups[0]) == ["Amy", "Bob", "Carly", "Dan"]
+        assert sorted(groups[1]) == ["Eesha", "Frank"]
+
     def test_separate_individuals(self):
         groups = [["Amy", "Bob", "Carly"], ["Dan", "Eesha", "Frank"]]
         apart = [["Amy", "Frank"], ["Dan", "Grace"]]
@@ -32,6 +46,42 @@ class Backend_Test(unittest.TestCase):
         chart = app.main.backend._separate_individuals(groups, apart)
         assert chart == []
 
+        apart = [["Amy", "Bob"], ["Carly", "Dan"], ["Amy", "Carly"]]
+        chart = app.main.backend._separate_individuals(groups, apart)
+        assert chart == [["Amy", "Dan"], ["Bob", "Carly"]]
+
+    def test_get_nested_position(self):
+        nested = [["Amy", "Bob"], ["Carly"]]
+        chart = app.main.backend._Chart(nested)
+        assert app.main.backend._get_nested_position("Carly", chart) == 1
+        assert app.main.backend._get_nested_position("Dan", chart) is None
+
+        chart.add("Dan", 0)
+        chart.new_group(["Eesha"])
+        assert app.main.backend._get_nested_position("Dan", chart) == 0
+        assert app.main.backend._get_nested_position("Eesha", chart) == 2
+        assert nested == [["Amy", "Bob", "Dan"], ["Carly"], ["Eesha"]]
+        assert app.main.backend._get_nested_position("Eesha", nested) == 2
+
+    def test_color_groups(self):
+        groups = [["Amy", "Bob"], ["Carly", "Dan"]]
+        apart = [["Amy", "Carly"], ["Amy", "Eesha"], ["Carly", "Eesha"]]
+        chart = app.main.backend._color_groups(groups, apart)
+        assert chart == [["Amy", "Bob"], ["Carly", "Dan"], ["Eesha"]]
+
+        # Greedy placement stops at the first full group and opens new ones
+        groups = [["Amy", "Bob", "Carly"], ["Dan", "Eesha"], ["Frank"]]
+        apart = [["Grace", "Henry"]]
+        greedy = app.main.backend._separate_individuals(groups, apart, max_size=3)
+        assert len(greedy) == 5
+        chart = app.main.backend._color_groups(groups, apart, max_size=3)
+        assert len(chart) == 3
+        assert ["Amy", "Bob", "Carly"] in chart
+        assert max([len(i) for i in chart]) <= 3
+        assert ["Grace" in group for group in chart] != [
+            "Henry" in group for group in chart
+        ]
+
     def test_append_item(self):
         chart = [["Amy", "Bob", "Carly"], ["Dan", "Eesha"]]
         apart = [
@@ -62,6 +112,20 @@ class Backend_Test(unittest.TestCase):
             ["Immanuel"],
         ]
 
+    def test_conflict_index(self):
+        apart = [["Amy", "Bob"], ["Amy", "Carly"], ["Bob", "Amy"]]
+        conflicts = app.main.backend._conflict_index(apart)
+        assert conflicts == {
+            "Amy": {"Bob", "Carly"},
+            "Bob": {"Amy"},
+            "Carly": {"Amy"},
+        }
+        assert app.main.backend._conflict_index(None) == {}
+
+        chart = [["Amy"], ["Dan"]]
+        app.main.backend._append_item("Bob", chart, conflicts, 4)
+        assert chart == [["Amy"], ["Dan", "Bob"]]
+
     def test_balance_nested_list(self):
         value = "1"
 
@@ -77,6 +141,12 @@ class Backend_Test(unittest.TestCase):
         app.main.backend._balance_nested_list(nested_3, value, num_groups=3)
         assert nested_3 == [["0", "0", "0", "1"], ["0", "0", "0"], ["0", "0", "0"]]
 
+        nested_4 = [["0", "0"], ["0"]]
+        balancer = app.main.backend._Balancer(nested_4, max_size=2, num_groups=4)
+        for item in ["1", "2", "3", "4"]:
+            balancer.add(item)
+        assert nested_4 == [["0", "0"], ["0", "3"], ["1", "4"], ["2"]]
+
     def test_create_seating_chart(self):
         names = [
             "Amy",
@@ -123,6 +193,154 @@ class Backend_Test(unittest.TestCase):
         assert len(chart_3) == 3
         assert max([len(i) for i in chart_3]) <= 4
 
+    def test_create_seating_charts(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank", "Grace", "Henry"]
+        together = [["Amy", "Bob"]]
+        apart = [["Amy", "Carly"]]
+
+        charts = app.main.backend.create_seating_charts(
+            names, together, apart, max_size=3, n=5, seed=1
+        )
+        assert len(charts) == 5
+        for chart in charts:
+            positions = {name: i for i, group in enumerate(chart) for name in group}
+            assert sorted(positions) == sorted(names)
+            assert positions["Amy"] == positions["Bob"]
+            assert positions["Amy"] != positions["Carly"]
+            assert max([len(i) for i in chart]) <= 3
+
+        again = app.main.backend.create_seating_charts(
+            names, together, apart, max_size=3, n=5, seed=1
+        )
+        assert charts == again
+
+    def test_create_seating_chart_seed(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank", "Grace"]
+        together = [["Amy", "Bob"]]
+        app.main.backend.clear_chart_cache()
+
+        chart_1 = app.main.backend.create_seating_chart(
+            names, together, max_size=3, seed=7
+        )
+        chart_2 = app.main.backend.create_seating_chart(
+            names, together, max_size=3, seed=7
+        )
+        assert chart_1 == chart_2
+        info = app.main.backend.chart_cache_info()
+        assert info["hits"] == 1 and info["misses"] == 1
+
+        # Cached charts are copied, so callers may mutate them
+        chart_1[0].append("Henry")
+        chart_3 = app.main.backend.create_seating_chart(
+            names, together, max_size=3, seed=7
+        )
+        assert chart_3 == chart_2
+
+        chart_4 = app.main.backend.create_seating_chart(
+            names, together, max_size=3, seed=random.Random(7)
+        )
+        assert chart_4 == chart_2
+        assert app.main.backend.chart_cache_info()["hits"] == 2
+
+    def test_phase_stats(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank"]
+        stats = app.main.backend.PhaseStats()
+        app.main.backend.create_seating_chart(
+            names, [["Amy", "Bob"]], [["Amy", "Carly"]], max_size=3, stats=stats
+        )
+        assert set(stats.timings) == {
+            "overlap_check",
+            "create_groups",
+            "feasibility",
+            "separate_individuals",
+            "remaining",
+            "shuffle",
+            "balance",
+        }
+        assert stats.counts["names"] == 6
+        assert stats.counts["balanced"] == 3
+        assert "balance;dur=" in stats.server_timing()
+
+    def test_normalize_constraints(self):
+        together = [["Amy", "Bob"], ["Bob", "Amy"], ["Carly", "Dan"]]
+        apart = [["Amy", "Eesha"], ["Eesha", "Amy"], ["Amy", "Eesha"]]
+        assert app.main.backend.normalize_constraints(together, apart) == (
+            [["Amy", "Bob"], ["Carly", "Dan"]],
+            [["Amy", "Eesha"]],
+        )
+        assert app.main.backend.normalize_constraints(None, []) == (None, None)
+
+        with self.assertRaises(app.main.backend.InfeasibleError) as e:
+            app.main.backend.normalize_constraints(together, [["Dan", "Carly"]])
+        assert e.exception.constraint == ["Dan", "Carly"]
+
+    def test_check_feasibility(self):
+        check_feasibility = app.main.backend.check_feasibility
+        InfeasibleError = app.main.backend.InfeasibleError
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank"]
+
+        check_feasibility(names, [["Amy", "Bob"]], [["Amy", "Carly"]], 3, 2)
+
+        with self.assertRaises(InfeasibleError):
+            check_feasibility(names, max_size=2, num_groups=2)
+
+        together = [["Amy", "Bob"], ["Bob", "Carly"]]
+        with self.assertRaises(InfeasibleError) as e:
+            check_feasibility(names, together, max_size=2)
+        assert sorted(e.exception.constraint) == ["Amy", "Bob", "Carly"]
+
+        with self.assertRaises(InfeasibleError) as e:
+            check_feasibility(names, together, [["Carly", "Amy"]])
+        assert e.exception.constraint == ["Carly", "Amy"]
+
+        apart = [["Amy", "Dan"], ["Dan", "Eesha"], ["Eesha", "Amy"]]
+        with self.assertRaises(InfeasibleError) as e:
+            check_feasibility(names, together, apart, num_groups=2)
+        assert sorted(e.exception.constraint) == ["Amy", "Dan", "Eesha"]
+
+        with self.assertRaises(ValueError):
+            app.main.backend.create_seating_chart(names, together, apart, num_groups=2)
+
+    def test_chart_problem(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank"]
+        problem = app.main.backend.ChartProblem(
+            names, [["Amy", "Bob"]], [["Amy", "Carly"]], max_size=3
+        )
+        assert problem.groups == (("Amy", "Bob"), ("Carly",))
+        assert sorted(problem.remaining) == ["Dan", "Eesha", "Frank"]
+
+        same = app.main.backend.ChartProblem(
+            names, [["Amy", "Bob"]], [["Amy", "Carly"]], max_size=3
+        )
+        assert problem == same
+        assert len({problem, same}) == 1
+
+        chart = problem.solve(random.Random(0))
+        assert chart == problem.solve(random.Random(0))
+        assert sorted(sum(chart, [])) == sorted(names)
+        assert problem.groups == (("Amy", "Bob"), ("Carly",))
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    def test_create_seating_chart_numpy(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank", "Grace", "Henry"]
+        together = [["Amy", "Bob"], ["Bob", "Carly"]]
+        apart = [["Amy", "Dan"], ["Dan", "Eesha"]]
+
+        chart = app.main.backend.create_seating_chart(
+            names, together, apart, max_size=4, engine="numpy"
+        )
+        positions = {name: i for i, group in enumerate(chart) for name in group}
+        assert sorted(positions) == sorted(names)
+        assert positions["Amy"] == positions["Bob"] == positions["Carly"]
+        assert positions["Amy"] != positions["Dan"]
+        assert positions["Dan"] != positions["Eesha"]
+        assert max([len(i) for i in chart]) <= 4
+
+        chart = app.main.backend.create_seating_chart(
+            names, None, None, num_groups=3, engine="numpy"
+        )
+        assert sorted([len(i) for i in chart]) == [2, 3, 3]
+
     def test_form_to_function(self):
         inpt = "Amy\n\rBob,Carly;Dan\nEesha\rFrank"
         output = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank"]
@@ -133,10 +351,16 @@ class Backend_Test(unittest.TestCase):
         assert app.main.backend.form_to_function(inpt, "groupings") == output
         assert app.main.backend.form_to_function(None, "groupings") is None
         assert app.main.backend.form_to_function("", "groupings") is None
-    
+
         assert app.main.backend.form_to_function(0, "integers") == float("Inf")
         assert app.main.backend.form_to_function(1, "integers") == 1
 
+    def test_read_roster(self):
+        lines = io.StringIO('Amy, Bob\n"Carly";Amy\n\n  Dan   Smith \nBob\n')
+        output = ["Amy", "Bob", "Carly", "Dan Smith"]
+        assert app.main.backend.read_roster(lines) == output
+        assert app.main.backend.read_roster([]) == []
+
     def test_render_output(self):
         inpt = [["Amy", "Bob"], ["Carly", "Dan"]]
         output = "Amy, Bob\n\rCarly, Dan"
@@ -0,0 +1,95 @@
+from .context import app
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+import app.main.jobs
+
+
+class Jobs_Test(unittest.TestCase):
+    """Test cases for the seatingchart.jobs module"""
+
+    def test_job_queue(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        queue = app.main.jobs.JobQueue(ttl=60, max_pending=1, executor=executor)
+        release = threading.Event()
+
+        job_id = queue.submit(lambda: release.wait() and ["a", "b"])
+        assert queue.status(job_id) == {"id": job_id, "status": "pending"}
+        with self.assertRaises(app.main.jobs.QueueFull):
+            queue.submit(sorted, ["b", "a"])
+
+        release.set()
+        executor.shutdown(wait=True)
+        assert queue.status(job_id) == {
+            "id": job_id,
+            "status": "done",
+            "result": ["a", "b"],
+        }
+        assert queue.status("missing") is None
+
+    def test_job_queue_failed(self):
+        executor = ThreadPoolExecutor(max_workers=1)
+        queue = app.main.jobs.JobQueue(ttl=60, executor=executor)
+        job_id = queue.submit(int, "a")
+        executor.shutdown(wait=True)
+
+        job = queue.status(job_id)
+        assert job["status"] == "failed"
+        assert "invalid literal" in job["result"]["error"]
+
+    def test_job_queue_store_error(self):
+        class LockedStore(app.main.jobs.MemoryJobStore):
+            def finish(self, job_id, status, result, expires):
+                raise sqlite3.OperationalError("database is locked")
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        queue = app.main.jobs.JobQueue(LockedStore(), max_pending=1, executor=executor)
+        queue.submit(sorted, ["b", "a"])
+        executor.shutdown(wait=True)
+
+        # The failed write still frees the job's pending slot
+        assert queue._pending == 0
+
+    def test_job_queue_store_add_error(self):
+        class LockedStore(app.main.jobs.MemoryJobStore):
+            def add(self, job_id, expires):
+                raise sqlite3.OperationalError("database is locked")
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        queue = app.main.jobs.JobQueue(LockedStore(), max_pending=1, executor=executor)
+        for _ in range(2):
+            with self.assertRaises(sqlite3.OperationalError):
+                queue.submit(sorted, ["b", "a"])
+        executor.shutdown(wait=True)
+
+        # Failed submits do not keep a pending slot
+        assert queue._pending == 0
+
+    def test_job_store_expiry(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            stores = [
+                app.main.jobs.MemoryJobStore(),
+                app.main.jobs.SqliteJobStore(os.path.join(tmp, "jobs.db")),
+            ]
+            for store in stores:
+                store.add("a", expires=10)
+                store.add("b", expires=10)
+                store.finish("b", "done", {"groups": [["x"]]}, expires=30)
+
+                assert store.get("a", now=5) == {"id": "a", "status": "pending"}
+                assert store.get("a", now=20) is None
+                store.purge(now=20)
+                assert store.get("a", now=5) is None
+                assert store.get("b", now=20) == {
+                    "id": "b",
+                    "status": "done",
+                    "result": {"groups": [["x"]]},
+                }
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+from .context import app
+import random
+import unittest
+
+import app.main.mixing
+
+
+class Mixing_Test(unittest.TestCase):
+    """Test cases for the seatingchart.mixing module"""
+
+    def test_pair_history(self):
+        charts = [[["Amy", "Bob"], ["Carly"]], [["Bob", "Amy", "Carly"]]]
+        history = app.main.mixing.pair_history(charts)
+        assert history == {
+            frozenset(["Amy", "Bob"]): 2,
+            frozenset(["Amy", "Carly"]): 1,
+            frozenset(["Bob", "Carly"]): 1,
+        }
+
+    def test_mix_groups(self):
+        chart = [["Amy", "Bob", "Carly"], ["Dan", "Eesha", "Frank"]]
+        history = app.main.mixing.pair_history([chart, chart])
+        together = [["Amy", "Bob"]]
+        apart = [["Carly", "Dan"]]
+
+        mixed = app.main.mixing.mix_groups(
+            chart, history, together, apart, rng=random.Random(0)
+        )
+        positions = {name: i for i, group in enumerate(mixed) for name in group}
+        assert [len(i) for i in mixed] == [3, 3]
+        assert positions["Amy"] == positions["Bob"]
+        assert positions["Carly"] != positions["Dan"]
+        # Carly can only trade places with Dan, who she must sit apart from
+        assert positions["Dan"] == positions["Amy"]
+        assert chart == [["Amy", "Bob", "Carly"], ["Dan", "Eesha", "Frank"]]
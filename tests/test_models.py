@@ -0,0 +1,64 @@
+from .context import app
+import unittest
+
+import app.models
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class Models_Test(unittest.TestCase):
+    """Test cases for the seatingchart.models module"""
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    def test_pair_history(self):
+        names = ["Amy", "Bob", "Carly", "Dan"]
+        history = app.models.PairHistory()
+        history.record([["Carly", "Amy"], ["Bob", "Dan"]], names)
+        history.record([["Amy", "Carly", "Dan"], ["Bob"]], names)
+
+        # Upper triangle of the 4 x 4 matrix: AB AC AD BC BD CD
+        assert history.to_array().tolist() == [0, 2, 1, 0, 1, 1]
+        assert history.as_history(names) == {
+            frozenset(["Amy", "Carly"]): 2,
+            frozenset(["Amy", "Dan"]): 1,
+            frozenset(["Bob", "Dan"]): 1,
+            frozenset(["Carly", "Dan"]): 1,
+        }
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    def test_pair_history_unknown_names(self):
+        names = ["Amy", "Bob", "Carly"]
+        history = app.models.PairHistory()
+        history.record([["Zoe", "Yuri"], ["Amy", "Xena"], ["Bob", "Carly"]], names)
+
+        # AB AC BC
+        assert history.to_array().tolist() == [0, 0, 1]
+
+    @unittest.skipIf(numpy is None, "requires numpy")
+    def test_pair_history_large(self):
+        names = ["Student {}".format(i) for i in range(5000)]
+        history = app.models.PairHistory()
+        chart = [["Student 0", "Student 1"], ["Student 4998", "Student 4999"]]
+        history.record(chart + [["Student 17", "Student 2500", "Student 4999"]], names)
+        history.record(chart, names)
+
+        assert history.as_history(names) == {
+            frozenset(["Student 0", "Student 1"]): 2,
+            frozenset(["Student 4998", "Student 4999"]): 2,
+            frozenset(["Student 17", "Student 2500"]): 1,
+            frozenset(["Student 17", "Student 4999"]): 1,
+            frozenset(["Student 2500", "Student 4999"]): 1,
+        }
+
+    def test_content_blob(self):
+        roster = '["Amy", "Bob", "Carly", "Dan"]'
+        blob = app.models.ContentBlob(**app.models.ContentBlob.encode(roster))
+
+        assert blob.text == roster
+        assert blob.size == len(roster)
+        assert blob.hash == app.models.ContentBlob.digest(roster)
+        assert blob.hash != app.models.ContentBlob.digest('["Amy", "Bob"]')
+        assert app.models.ContentBlob.text_of(None) is None
@@ -0,0 +1,211 @@
+from .context import app, TestConfig
+import unittest
+import io
+import itertools
+import re
+from html import unescape
+
+from app import db
+from app.main.backend import chart_cache_info, clear_chart_cache
+from app.main.storage import SESSION_ROSTER_CHARS, save_groups
+from app.models import ContentBlob, Group, User
+
+
+class Routes_Test(unittest.TestCase):
+    """Test cases for the index page routes, through the Flask test client"""
+
+    form = {
+        "individuals": "Amy\nBob\nCarly\nDan\nEesha\nFrank",
+        "together": "",
+        "separate": "",
+        "num_groups": 0,
+        "max_size": 2,
+    }
+
+    def setUp(self):
+        self.app = app.create_app(TestConfig)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        user = User(username="teacher", email="teacher@example.com")
+        user.set_password("secret")
+        db.session.add(user)
+        db.session.commit()
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def login(self):
+        self.client.post(
+            "/auth/login", data={"identifier": "teacher", "password": "secret"}
+        )
+
+    def chart(self, response):
+        return self.chart_text(response.get_data(as_text=True))
+
+    def chart_text(self, html):
+        match = re.search(r'<textarea name="groups"[^>]*>(.*?)</textarea>', html, re.S)
+        text = match.group(1)
+        return [line.split(", ") for line in text.strip().split("\n\r")]
+
+    def generate(self, query="", **fields):
+        return self.client.post("/" + query, data=dict(self.form, **fields))
+
+    def test_generate_anonymous(self):
+        long_roster = "\n".join("Student {}".format(i) for i in range(1000))
+        for individuals in [self.form["individuals"], long_roster]:
+            assert self.generate(individuals=individuals).status_code == 200
+
+        # Anonymous rosters are never stored; long ones are not kept at all
+        assert ContentBlob.query.count() == 0
+        with self.client.session_transaction() as session:
+            assert "names" not in session["group_generation_form"]
+            assert "roster" not in session["group_generation_form"]
+
+    def test_generate_long_roster(self):
+        self.login()
+        self.generate()
+        assert ContentBlob.query.count() == 0
+
+        names = ["Student {}".format(i) for i in range(1000)]
+        assert len("\n".join(names)) > SESSION_ROSTER_CHARS
+        self.generate(individuals="\n".join(names))
+        assert ContentBlob.query.count() == 1
+        with self.client.session_transaction() as session:
+            roster = session["group_generation_form"]["roster"]
+
+        # The saved group reuses the stashed roster
+        self.client.post("/save/", data={"title": "Period 1"})
+        group = Group.query.filter_by(title="Period 1").first()
+        assert group.individuals_hash == roster
+
+    def test_generate_upload(self):
+        def upload(data, filename):
+            roster = (io.BytesIO(data), filename)
+            response = self.generate(individuals="", roster=roster)
+            assert response.status_code == 200
+            return response.get_data(as_text=True)
+
+        html = upload(b"Amy,Bob\nCarly\nDan\n", "roster.csv")
+        assert sorted(sum(self.chart_text(html), [])) == ["Amy", "Bob", "Carly", "Dan"]
+
+        # Unreadable or wrong-type uploads are form errors, reported once
+        html = upload("Amélie\nBob\n".encode("latin-1"), "roster.csv")
+        assert html.count("Please upload a UTF-8 encoded .csv or .txt file.") == 1
+        html = upload(b"\x89PNG\r\n\x1a\n", "roster.png")
+        assert html.count("Please upload a .csv or .txt file.") == 1
+
+    def test_generate_profile(self):
+        self.app.config["PROFILE_BACKEND"] = True
+        clear_chart_cache()
+
+        response = self.generate()
+        timing = response.headers["Server-Timing"]
+        assert "cache" not in timing and "feasibility" in timing
+        assert chart_cache_info()["size"] == 0
+
+        # Shared links are served from the chart cache
+        first = self.generate("?seed=7").get_data(as_text=True)
+        assert self.generate("?seed=7").get_data(as_text=True) == first
+        assert chart_cache_info()["hits"] == 1
+
+    def test_accept(self):
+        self.login()
+        self.generate()
+        self.client.post("/save/", data={"title": "Period 1"})
+        self.client.get("/load/Period 1")
+
+        # Each accepted chart is regenerated from its seed, mixing included
+        pairs = {}
+        for _ in range(2):
+            response = self.generate()
+            assert "Accept for Period 1" in response.get_data(as_text=True)
+            for group in self.chart(response):
+                for pair in itertools.combinations(group, 2):
+                    pairs[frozenset(pair)] = pairs.get(frozenset(pair), 0) + 1
+            assert self.client.get("/accept/").status_code == 302
+
+        group = Group.query.filter_by(title="Period 1").first()
+        names = self.form["individuals"].split("\n")
+        assert group.history.as_history(names) == pairs
+
+        # The seed is used up, so the same chart cannot be accepted twice
+        update_time = group.history.update_time
+        self.client.get("/accept/")
+        assert group.history.update_time == update_time
+
+    def test_loaded_group_stale(self):
+        self.login()
+        self.generate()
+        self.client.post("/save/", data={"title": "Period 1"})
+        self.client.get("/load/Period 1")
+
+        # Generating for another roster forgets the loaded group
+        response = self.generate(individuals="Xena\nYuri\nZoe")
+        assert "Accept for" not in response.get_data(as_text=True)
+        with self.client.session_transaction() as session:
+            assert "loaded_group" not in session
+
+        self.client.get("/accept/")
+        assert Group.query.filter_by(title="Period 1").first().history is None
+
+    def test_user_pages(self):
+        self.app.config["GROUPS_PER_PAGE"] = 2
+        self.login()
+
+        # Groups saved in one batch share a creation time, so pages must
+        # also be split on id
+        form = {k: self.form[k] for k in ["together", "num_groups", "max_size"]}
+        form.update(names=self.form["individuals"], apart="")
+        user_id = User.query.filter_by(username="teacher").one().id
+        save_groups(user_id, [("Group {}".format(i), form) for i in range(5)])
+
+        titles, url, pages = [], "/user/teacher", 0
+        while url is not None:
+            html = self.client.get(url).get_data(as_text=True)
+            titles += re.findall(r"<td>(Group \d)</td>", html)
+            older = re.search(r'<li class="next"><a href="([^"]+)">Older', html)
+            url = older and unescape(older.group(1))
+            pages += 1
+
+        # The last page has no "Older" link
+        assert pages == 3
+        assert titles == ["Group {}".format(i) for i in range(4, -1, -1)]
+
+    def test_user_pages_bad_cursor(self):
+        self.login()
+        for before in ["older", "2026-10-18T10:27:05.118342_x", "yesterday_3"]:
+            response = self.client.get("/user/teacher", query_string={"before": before})
+            assert response.status_code == 404
+
+    def test_old_session(self):
+        self.login()
+        with self.client.session_transaction() as session:
+            session["group_generation_form"] = {
+                "names": "Amy\nBob\nCarly",
+                "together": "",
+                "apart": "",
+                "num_groups": 0,
+                "max_size": 2,
+            }
+        response = self.client.get("/")
+        assert response.status_code == 200
+        assert "Amy\nBob\nCarly" in response.get_data(as_text=True)
+
+        with self.client.session_transaction() as session:
+            session["group_generation_form"] = {
+                "names": "Amy\nBob\nCarly",
+                "together": "",
+                "apart": "",
+                "num_groups": 0,
+                "max_size": 2,
+            }
+            session["group_generation_seed"] = 1
+        assert self.client.get("/accept/").status_code == 302
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+from .context import app
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+import app.main.search
+
+
+class Search_Test(unittest.TestCase):
+    """Test cases for the seatingchart.search module"""
+
+    def test_score_chart(self):
+        score = app.main.search.score_chart([["Amy", "Bob"], ["Carly", "Dan"]], 3)
+        assert score == (0.0, -1)
+
+        lopsided = app.main.search.score_chart([["Amy", "Bob", "Carly"], ["Dan"]], 3)
+        assert lopsided > score
+
+        assert app.main.search.is_balanced([["Amy", "Bob"], ["Carly"]])
+        assert not app.main.search.is_balanced([["Amy", "Bob", "Carly"], ["Dan"]])
+
+    def test_best_seating_chart(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank", "Grace", "Henry"]
+        problem = app.main.backend.ChartProblem(
+            names, [["Amy", "Bob"]], [["Amy", "Carly"]], max_size=3
+        )
+        chart = app.main.search.best_seating_chart(problem, n=16, workers=1, seed=0)
+        assert sorted(sum(chart, [])) == sorted(names)
+        assert app.main.search.is_balanced(chart)
+
+        # Greedy separation opens a third group, so every solve fails
+        together = [["Amy", "Bob"], ["Bob", "Carly"], ["Carly", "Dan"]]
+        problem = app.main.backend.ChartProblem(
+            names, together, [["Eesha", "Frank"]], max_size=4, num_groups=2
+        )
+        with self.assertRaises(ValueError):
+            app.main.search.best_seating_chart(problem, n=4, workers=1)
+
+    def test_best_seating_chart_budget(self):
+        names = ["Student {}".format(i) for i in range(300)]
+        problem = app.main.backend.ChartProblem(names, max_size=7)
+
+        # The budget runs out before a new pool has solved anything
+        with ProcessPoolExecutor(max_workers=2) as pool:
+            chart = app.main.search.best_seating_chart(
+                problem, n=16, budget=0, seed=0, executor=pool
+            )
+        assert sorted(sum(chart, [])) == sorted(names)
+
+    def test_shared_pool(self):
+        names = ["Amy", "Bob", "Carly", "Dan", "Eesha", "Frank"]
+        problem = app.main.backend.ChartProblem(names, max_size=2)
+        chart = app.main.search.best_seating_chart(problem, n=4, workers=2, seed=0)
+        assert sorted(sum(chart, [])) == sorted(names)
+
+        # Later searches reuse the same pool instead of starting one
+        pool = app.main.search.shared_pool()
+        app.main.search.best_seating_chart(problem, n=4, seed=1)
+        assert app.main.search.shared_pool() is pool
@@ -0,0 +1,149 @@
+from .context import app, TestConfig
+import unittest
+from unittest import mock
+
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+
+import app.main.storage
+from app import db
+from app.models import ContentBlob, Group, GroupConfig, User
+
+
+class Storage_Test(unittest.TestCase):
+    """Test cases for the seatingchart.storage module"""
+
+    def test_ttl_cache(self):
+        cache = app.main.storage._TTLCache(maxsize=2, ttl=10)
+        with mock.patch("time.monotonic", return_value=0):
+            cache.put((1, "a"), {"names": "Amy"})
+            cache.put((1, "b"), {"names": "Bob"})
+            assert cache.get((1, "a")) == {"names": "Amy"}
+
+            # (1, "b") is now least recently used
+            cache.put((1, "c"), {"names": "Carly"})
+            assert cache.get((1, "b")) is None
+            assert cache.get((1, "a")) == {"names": "Amy"}
+
+            cache.pop((1, "a"))
+            assert cache.get((1, "a")) is None
+
+        with mock.patch("time.monotonic", return_value=11):
+            assert cache.get((1, "c")) is None
+
+        assert (cache.hits, cache.misses) == (2, 3)
+
+
+class Storage_Db_Test(unittest.TestCase):
+    """Test cases for the seatingchart.storage save paths, on in-memory SQLite"""
+
+    form = {
+        "names": "Amy\nBob\nCarly",
+        "together": "Amy, Bob",
+        "apart": "",
+        "max_size": 2,
+        "num_groups": 0,
+    }
+
+    def setUp(self):
+        self.app = app.create_app(TestConfig)
+        self.context = self.app.app_context()
+        self.context.push()
+        db.create_all()
+        self.user = User(username="teacher", email="teacher@example.com")
+        db.session.add(self.user)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.context.pop()
+
+    def test_save_group(self):
+        group = app.main.storage.save_group(self.user.id, "Period 1", self.form)
+        config = group.config.first()
+
+        assert group.id is not None
+        assert config.group_id == group.id
+        assert group.individuals == '["Amy", "Bob", "Carly"]'
+        assert config.pairs == '[["Amy", "Bob"]]'
+
+    def test_save_groups(self):
+        ids = app.main.storage.save_groups(
+            self.user.id, [("Period 1", self.form), ("Period 2", self.form)]
+        )
+        assert len(ids) == 2
+        assert GroupConfig.query.filter(GroupConfig.group_id.in_(ids)).count() == 2
+        # Both groups share one roster and one pair list
+        assert ContentBlob.query.count() == 3
+
+    def test_save_groups_rollback(self):
+        app.main.storage.save_group(self.user.id, "Period 1", self.form)
+        counts = (Group.query.count(), GroupConfig.query.count())
+        form = dict(self.form, names="Dan\nEesha")
+
+        # The duplicate title is last, so the rows before it must roll back too
+        with self.assertRaises(IntegrityError):
+            app.main.storage.save_groups(
+                self.user.id, [("Period 2", form), ("Period 1", form)]
+            )
+
+        assert (Group.query.count(), GroupConfig.query.count()) == counts
+        assert Group.query.filter_by(title="Period 2").first() is None
+        assert ContentBlob.query.count() == 3
+
+    def test_blob_insert_race(self):
+        text = '["Amy", "Bob"]'
+        blob = ContentBlob.for_text(text)
+        db.session.commit()
+
+        # Another request inserted the blob between our lookup and our insert
+        query = ContentBlob.query
+        with mock.patch.object(ContentBlob, "query") as patched:
+            patched.get.side_effect = [None, blob]
+            assert ContentBlob.for_text(text) is blob
+        assert ContentBlob.store_many([text, "[]"]) == {
+            text: blob.hash,
+            "[]": ContentBlob.digest("[]"),
+        }
+        db.session.commit()
+        assert query.count() == 2
+
+    def test_load_form(self):
+        user_id = self.user.id
+        app.main.storage.save_group(user_id, "Period 1", self.form)
+        app.main.storage.clear_load_cache()
+        db.session.expire_all()
+
+        form, statements = self.statements(
+            app.main.storage.load_form, user_id, "Period 1"
+        )
+        assert form["together"] == "Amy, Bob"
+        assert len(statements) == 1
+
+    def test_save_group_statements(self):
+        user_id = self.user.id
+        group, statements = self.statements(
+            app.main.storage.save_group, user_id, "Period 1", self.form
+        )
+
+        # One blob lookup and insert, then the group and its config
+        assert len(statements) == 4
+        assert statements[1].startswith("INSERT") and "contentblob" in statements[1]
+
+    def statements(self, func, *args):
+        """Returns what `func(*args)` returns, and the SQL it executed"""
+        statements = []
+
+        def count(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", count)
+        try:
+            return func(*args), statements
+        finally:
+            event.remove(db.engine, "before_cursor_execute", count)
+
+
+if __name__ == "__main__":
+    unittest.main()